@@ -0,0 +1,99 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from compiled_model import CompiledModel
+from feature_encoder import FeatureEncoder, default_encoder
+from ingest import DEFAULT_CHUNKSIZE, ID_COLUMN, iter_feature_blocks, read_postings
+from model_loader import DEFAULT_MODEL_PATH, load_model
+from parallel_score import ParallelScorer, default_workers
+from scoring import label_names, predict_block
+
+OUTPUT_COLUMNS = [ID_COLUMN, 'prediction', 'label', 'fake_probability']
+
+
+def _prediction_frame(chunk, predictions, fake_probability):
+    return pd.DataFrame({
+        ID_COLUMN: chunk[ID_COLUMN].to_numpy(),
+        'prediction': predictions,
+        'label': label_names(predictions),
+        'fake_probability': fake_probability,
+    })
+
+
+# Predictions for one block of postings and its encoded features, one model call
+# per block, or one per shard when a ParallelScorer is given
+def score_block(model, chunk, X, scorer=None):
+    if scorer is None:
+        predictions, fake_probability = predict_block(model, X)
+    else:
+        predictions, fake_probability = scorer.score(X)
+    return _prediction_frame(chunk, predictions, fake_probability)
+
+
+# Predictions of every posting chunk looked up in a compiled table, no model calls
+def _compiled_blocks(input_path, compiled, chunksize):
+    encoder = default_encoder()
+    for chunk in read_postings(input_path, chunksize):
+        yield _prediction_frame(chunk, *compiled.predict_codes(encoder.codes(chunk)))
+
+
+def _model_blocks(input_path, model_path, chunksize, workers, backend):
+    model = load_model(model_path)
+    encoder = FeatureEncoder.for_model(model)
+    scorer = None
+    if workers != 1:
+        scorer = ParallelScorer(model_path, workers, backend,
+                                shard_size=max(chunksize // (workers or default_workers()), 1))
+    try:
+        for chunk, X in iter_feature_blocks(input_path, encoder, chunksize):
+            yield score_block(model, chunk, X, scorer)
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+
+# Stream the input csv through the encoder and append each block's predictions to output.
+# With a compiled table (see compiled_model.py) the estimator is not used at all.
+def score_csv(input_path, output_path, model_path=DEFAULT_MODEL_PATH, chunksize=DEFAULT_CHUNKSIZE,
+              workers=1, backend='process', compiled=None):
+    if compiled is not None:
+        blocks = _compiled_blocks(input_path, compiled, chunksize)
+    else:
+        blocks = _model_blocks(input_path, model_path, chunksize, workers, backend)
+
+    rows = fakes = 0
+    with open(output_path, 'w', newline='') as out:
+        for scored in blocks:
+            scored.to_csv(out, header=rows == 0, index=False, columns=OUTPUT_COLUMNS)
+            rows += len(scored)
+            fakes += int((scored['prediction'] == 1).sum())
+    return rows, fakes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a csv of job postings with the job posting classifier.')
+    parser.add_argument('input', help='csv with the fake_job_postings.csv columns')
+    parser.add_argument('-o', '--output', default='predictions.csv', help='where to write the predictions')
+    parser.add_argument('-m', '--model', default=DEFAULT_MODEL_PATH, help='pickled classifier')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='rows encoded and scored per model call')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='parallel scoring workers, 0 for one per core')
+    parser.add_argument('--backend', choices=['process', 'thread'], default='process',
+                        help='worker pool used when --workers is not 1')
+    parser.add_argument('--compiled', metavar='TABLE',
+                        help='score from a lookup table built by compiled_model.py instead of calling the model')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    compiled = CompiledModel(args.compiled) if args.compiled else None
+    rows, fakes = score_csv(args.input, args.output, args.model, args.chunksize, args.workers, args.backend, compiled)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} postings ({fakes} fake) in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+import argparse
+import csv
+import json
+import os
+import pickle
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import BINARY_FIELDS, CATEGORICAL_FIELDS, FIELDS, default_encoder
+from model_loader import clear_cache, load_model
+from scoring import predict_block
+
+DEFAULT_BASELINE = 'benchmarks_baseline.json'
+DEFAULT_ROWS = 10000
+DEFAULT_REPEAT = 20
+# Single row benchmarks are called this many times, one row per call
+DEFAULT_CALLS = 1000
+# A benchmark regresses when its throughput drops, or its peak memory grows, by more than this
+DEFAULT_TOLERANCE = 0.25
+# Peak memory below this many bytes is noise and never counts as a regression
+MEMORY_SLACK = 64 * 1024
+
+# Filler words for the synthetic posting texts, next to the words of the categories
+_TEXT_WORDS = ('we', 'are', 'looking', 'for', 'a', 'team', 'work', 'experience', 'salary', 'apply', 'now',
+               'home', 'skills', 'company', 'benefits', 'opportunity', 'remote', 'join', 'our', 'growing',
+               'paid', 'training', 'weekly', 'bonus', 'candidate', 'required', 'immediate', 'start')
+
+
+# DataFrame of n postings with the answers the app pages offer, drawn uniformly
+# from the selectbox vocabularies, plus a company, a link and a posting text.
+# The same seed always gives the same postings.
+def synthetic_postings(n, seed=0, text_words=40):
+    rng = np.random.RandomState(seed)
+    columns = {}
+    for field in BINARY_FIELDS:
+        columns[field] = np.where(rng.randint(0, 2, n) == 1, 'Yes', 'No').astype(object)
+    for field, options in CATEGORICAL_FIELDS.items():
+        columns[field] = np.array(options, dtype=object)[rng.randint(0, len(options), n)]
+    companies = rng.randint(0, max(n // 10, 1), n)
+    columns['company_name'] = [f'Company {company}' for company in companies]
+    columns['reference_link'] = [f'https://jobs.example.com/{company}/{i}' for i, company in enumerate(companies)]
+
+    vocabulary = set(_TEXT_WORDS)
+    for options in CATEGORICAL_FIELDS.values():
+        for option in options:
+            vocabulary.update(option.lower().split())
+    vocabulary = np.array(sorted(vocabulary), dtype=object)
+    words = vocabulary[rng.randint(0, len(vocabulary), (n, text_words))]
+    columns['text'] = [' '.join(row) for row in words]
+    return pd.DataFrame(columns)
+
+
+# Postings of a frame as the dicts the app pages build
+def synthetic_dicts(frame):
+    return frame[list(FIELDS)].to_dict('records')
+
+
+# Decision tree fitted on synthetic postings labelled by the default rules, so
+# the prediction benchmarks run the same way without the trained job_posting.pkl
+def synthetic_model(seed=0, rows=5000):
+    from sklearn.tree import DecisionTreeClassifier
+
+    from rules import default_rules
+
+    frame = synthetic_postings(rows, seed)
+    labels, _, _ = default_rules().predict(frame)
+    return DecisionTreeClassifier(random_state=seed).fit(default_encoder().encode(frame), labels)
+
+
+# Shared inputs of the benchmarks: the postings, their features, the model and
+# a scratch directory for the files the I/O benchmarks write
+class Workload:
+    def __init__(self, rows=DEFAULT_ROWS, seed=0, model_path=None, directory=None):
+        self.rows = rows
+        self.seed = seed
+        self.directory = directory or tempfile.mkdtemp(prefix='benchmarks_')
+        self.frame = synthetic_postings(rows, seed)
+        self.postings = synthetic_dicts(self.frame)
+        self.X = default_encoder().encode(self.frame)
+        self.synthetic_model = model_path is None
+        if model_path is None:
+            model_path = os.path.join(self.directory, 'model.pkl')
+            with open(model_path, 'wb') as f:
+                pickle.dump(synthetic_model(seed), f)
+        self.model_path = model_path
+        self.model = load_model(model_path)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+
+# Every benchmark takes the workload and returns (function to time, rows per call)
+def bench_encode_row(workload):
+    encoder, postings = default_encoder(), workload.postings
+    state = {'i': 0}
+
+    def run():
+        encoder.encode_row(postings[state['i'] % len(postings)])
+        state['i'] += 1
+    return run, 1
+
+
+def bench_encode_batch(workload):
+    encoder, frame = default_encoder(), workload.frame
+    return lambda: encoder.encode(frame), workload.rows
+
+
+def bench_predict_row(workload):
+    model, X = workload.model, workload.X
+    state = {'i': 0}
+
+    def run():
+        i = state['i'] % len(X)
+        model.predict(X[i:i + 1])
+        state['i'] += 1
+    return run, 1
+
+
+def bench_predict_batch(workload):
+    model, X = workload.model, workload.X
+    return lambda: predict_block(model, X), workload.rows
+
+
+# Cold load of the model file, as after a restart or a hot swap
+def bench_model_load(workload):
+    def run():
+        clear_cache()
+        load_model(workload.model_path)
+    return run, 1
+
+
+# One feedback row appended to the csv, the way the pages wrote feedback before the store
+def bench_feedback_csv(workload):
+    path = workload.path('job_posting_feedback.csv')
+    frame = workload.frame
+    state = {'i': 0}
+
+    def run():
+        i = state['i'] % len(frame)
+        with open(path, 'a', newline='') as f:
+            csv.writer(f).writerow([frame['company_name'].iat[i], frame['reference_link'].iat[i], 'Yes'])
+        state['i'] += 1
+    return run, 1
+
+
+# One feedback row committed to the SQLite store, as the feedback page does
+def bench_feedback_sqlite(workload):
+    from storage import Store
+
+    store = Store(workload.path('job_postings.db'))
+    frame = workload.frame
+    state = {'i': 0}
+
+    def run():
+        i = state['i'] % len(frame)
+        store.add_feedback(frame['company_name'].iat[i], frame['reference_link'].iat[i], 'Yes')
+        state['i'] += 1
+    return run, 1
+
+
+def bench_vectorize_count(workload):
+    from text_model import make_vectorizer
+
+    texts = workload.frame['text']
+    vectorizer = make_vectorizer('count').fit(texts)
+    return lambda: vectorizer.transform(texts), workload.rows
+
+
+def bench_vectorize_hashing(workload):
+    from text_model import make_vectorizer
+
+    texts = workload.frame['text']
+    vectorizer = make_vectorizer('hashing')
+    return lambda: vectorizer.transform(texts), workload.rows
+
+
+# name -> (benchmark, whether it times single rows)
+BENCHMARKS = {
+    'encode_row': (bench_encode_row, True),
+    'encode_batch': (bench_encode_batch, False),
+    'predict_row': (bench_predict_row, True),
+    'predict_batch': (bench_predict_batch, False),
+    'model_load': (bench_model_load, False),
+    'feedback_csv': (bench_feedback_csv, True),
+    'feedback_sqlite': (bench_feedback_sqlite, True),
+    'vectorize_count': (bench_vectorize_count, False),
+    'vectorize_hashing': (bench_vectorize_hashing, False),
+}
+
+
+# Time calls of run after one warm up call, then trace one more call for its
+# peak memory; tracing is kept out of the timed calls since it slows them down.
+# Returns throughput in rows per second, latency percentiles per call in ms and
+# the peak of memory allocated during a call in bytes.
+def measure(run, rows_per_call, calls):
+    run()
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        run()
+        times[i] = time.perf_counter() - start
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    run()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    if not tracing:
+        tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+    return {
+        'calls': calls,
+        'rows_per_call': rows_per_call,
+        'rows_per_second': rows_per_call / max(np.median(times), 1e-12),
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'p99_ms': p99,
+        'peak_memory_bytes': int(max(peak, 0)),
+    }
+
+
+def run_benchmarks(names, workload, repeat=DEFAULT_REPEAT, calls=DEFAULT_CALLS):
+    results = {}
+    for name in names:
+        benchmark, single = BENCHMARKS[name]
+        run, rows_per_call = benchmark(workload)
+        results[name] = measure(run, rows_per_call, calls if single else repeat)
+    return results
+
+
+# What a result depends on besides the code: compared results should come from the same machine and setup
+def environment(workload):
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'rows': workload.rows,
+        'seed': workload.seed,
+        'model': 'synthetic' if workload.synthetic_model else workload.model_path,
+    }
+
+
+def save_baseline(path, results, env):
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'environment': env, 'results': results}, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Regressions against the baseline results: benchmarks whose throughput fell, or
+# whose peak memory grew, by more than tolerance. Returns (name, message) pairs.
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        speed = result['rows_per_second'] / before['rows_per_second']
+        if speed < 1 - tolerance:
+            regressions.append((name, f"throughput {before['rows_per_second']:.0f} -> "
+                                      f"{result['rows_per_second']:.0f} rows/s ({speed - 1:+.0%})"))
+        memory, memory_before = result['peak_memory_bytes'], before['peak_memory_bytes']
+        if memory > max(memory_before * (1 + tolerance), memory_before + MEMORY_SLACK):
+            regressions.append((name, f"peak memory {memory_before} -> {memory} bytes"))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = [f"{'benchmark':<18} {'rows/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9}"
+             + ('   vs baseline' if baseline else '')]
+    for name, result in results.items():
+        line = (f"{name:<18} {result['rows_per_second']:>12.0f} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+                f"{result['p99_ms']:>9.3f} {result['peak_memory_bytes'] / 1024:>9.1f}")
+        if baseline and name in baseline:
+            line += f"   {result['rows_per_second'] / baseline[name]['rows_per_second'] - 1:+.0%}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark encoding, prediction and I/O on synthetic postings.')
+    parser.add_argument('benchmarks', nargs='*', default=list(BENCHMARKS),
+                        help=f"benchmarks to run, all of them by default: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='synthetic postings per batch')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='timed calls of the batch benchmarks')
+    parser.add_argument('--calls', type=int, default=DEFAULT_CALLS, help='timed calls of the single row benchmarks')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-m', '--model', default=None,
+                        help='pickled classifier to benchmark, a tree fitted on synthetic postings otherwise')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='json file of baseline results')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed throughput drop and memory growth before a benchmark fails')
+    parser.add_argument('-o', '--output', default=None, help='also write the results as json')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix='benchmarks_') as directory:
+        workload = Workload(args.rows, args.seed, args.model, directory)
+        env = environment(workload)
+        start = time.perf_counter()
+        results = run_benchmarks(args.benchmarks, workload, args.repeat, args.calls)
+        elapsed = time.perf_counter() - start
+        clear_cache()
+
+    if args.output:
+        save_baseline(args.output, results, env)
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)['results'] if os.path.exists(args.baseline) else {}
+        save_baseline(args.baseline, dict(baseline, **results), env)
+        print(format_results(results))
+        print(f"Ran {len(results)} benchmarks in {elapsed:.1f}s, saved as baseline {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(format_results(results))
+        print(f"Ran {len(results)} benchmarks in {elapsed:.1f}s, no baseline at {args.baseline} to compare with",
+              file=sys.stderr)
+        return 0
+
+    stored = load_baseline(args.baseline)
+    print(format_results(results, stored['results']))
+    changed = {key: (stored['environment'].get(key), value) for key, value in env.items()
+               if stored['environment'].get(key) != value}
+    for key, (before, after) in changed.items():
+        print(f"warning: baseline was recorded with {key}={before}, this run has {after}", file=sys.stderr)
+    regressions = compare(results, stored['results'], args.tolerance)
+    for name, message in regressions:
+        print(f"REGRESSION {name}: {message}", file=sys.stderr)
+    print(f"Ran {len(results)} benchmarks in {elapsed:.1f}s, {len(regressions)} regressions against {args.baseline}",
+          file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
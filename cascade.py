@@ -0,0 +1,247 @@
+import argparse
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureEncoder, default_encoder
+from ingest import DEFAULT_CHUNKSIZE, ID_COLUMN, posting_columns, read_postings
+from model_loader import DEFAULT_MODEL_PATH, load_model
+from prediction_cache import shared_cache
+from rules import default_rules
+from scoring import label_names, predict_block
+
+STAGES = ('feedback', 'rules', 'model', 'text_model')
+
+# Posting fields the feedback lookup matches on; the feedback form stores both
+LINK_FIELD = 'reference_link'
+COMPANY_FIELD = 'company_name'
+TEXT_FIELD = 'text'
+
+# Feedback answers that count as a verdict
+FEEDBACK_VERDICTS = {'Yes': 0, 'No': 1}
+
+# Rule scores at or below the first bound are real, at or above the second fake,
+# anything in between goes to the model
+DEFAULT_RULE_BANDS = (0, 4)
+# Model fake probabilities strictly between these are passed to the text model, when there is one
+DEFAULT_MODEL_BANDS = (0.35, 0.65)
+
+
+def _key(value):
+    if value is None or value != value:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+def _field(postings, field):
+    if isinstance(postings, dict):
+        postings = [postings]
+    if hasattr(postings, 'columns'):
+        return postings[field].tolist() if field in postings else [None] * len(postings)
+    return [posting.get(field) for posting in postings]
+
+
+# Verdicts of the feedback store by reference link and by company name. Only
+# agreeing feedback decides: min_votes answers of which min_agreement say the same.
+# New feedback is picked up incrementally with the store's row id watermark.
+class FeedbackIndex:
+    def __init__(self, store, min_votes=1, min_agreement=0.8):
+        self.store = store
+        self.min_votes = min_votes
+        self.min_agreement = min_agreement
+        self._votes = {LINK_FIELD: {}, COMPANY_FIELD: {}}
+        self._watermark = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            rows = self.store.feedback_since(self._watermark)
+            for row in rows:
+                verdict = FEEDBACK_VERDICTS.get(row['is_real_posting'])
+                if verdict is None:
+                    continue
+                for field in (LINK_FIELD, COMPANY_FIELD):
+                    key = _key(row[field])
+                    if key is not None:
+                        self._votes[field].setdefault(key, [0, 0])[verdict] += 1
+            if rows:
+                self._watermark = rows[-1]['id']
+
+    def verdict(self, field, value):
+        votes = self._votes[field].get(_key(value))
+        if votes is None or sum(votes) < self.min_votes:
+            return -1
+        for label in (0, 1):
+            if votes[label] / sum(votes) >= self.min_agreement:
+                return label
+        return -1
+
+    # -1 for undecided, else 0 (real) or 1 (fake) for every posting; a link verdict wins over a company one
+    def lookup(self, postings):
+        self.refresh()
+        links, companies = _field(postings, LINK_FIELD), _field(postings, COMPANY_FIELD)
+        verdicts = np.full(len(links), -1, dtype=np.int64)
+        for i, (link, company) in enumerate(zip(links, companies)):
+            verdict = self.verdict(LINK_FIELD, link)
+            verdicts[i] = verdict if verdict >= 0 else self.verdict(COMPANY_FIELD, company)
+        return verdicts
+
+
+# Scores postings in stages from cheapest to most expensive, every stage only
+# seeing the postings the previous ones left undecided:
+#   feedback    known real / fake postings from the feedback store
+#   rules       rule scores clearly below or above rule_bands
+#   model       the classifier on the encoded answers
+#   text_model  the text classifier, for model probabilities inside model_bands
+#               (only with a text model and postings that carry a 'text' field)
+class Cascade:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, store=None, rule_set=None, rule_bands=DEFAULT_RULE_BANDS,
+                 text_model=None, model_bands=DEFAULT_MODEL_BANDS, use_cache=True):
+        self.model_path = model_path
+        self.feedback = FeedbackIndex(store) if store is not None else None
+        self.rule_set = rule_set or default_rules()
+        self.rule_bands = rule_bands
+        self.text_model = text_model
+        self.model_bands = model_bands
+        self.use_cache = use_cache
+        self.counts = dict.fromkeys(STAGES, 0)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def _model_stage(self, codes):
+        model = load_model(self.model_path)
+        X = FeatureEncoder.for_model(model).encode_codes(codes)
+        if self.use_cache:
+            return shared_cache(self.model_path).predict(X)
+        return predict_block(model, X)
+
+    def _text_stage(self, texts):
+        proba = self.text_model.predict_proba(texts)
+        fake_probability = proba[:, np.flatnonzero(np.asarray(self.text_model.classes_) == 1)[0]]
+        return (fake_probability >= 0.5).astype(np.int64), fake_probability
+
+    # (predictions, fake_probability, stages, rule fired matrix) for a dict, a
+    # list of dicts or a DataFrame of postings
+    def predict(self, postings):
+        codes = default_encoder().codes(postings)
+        n = len(codes)
+        predictions = np.full(n, -1, dtype=np.int64)
+        fake_probability = np.full(n, np.nan)
+        stages = np.empty(n, dtype=object)
+
+        if self.feedback is not None:
+            verdicts = self.feedback.lookup(postings)
+            known = verdicts >= 0
+            predictions[known] = verdicts[known]
+            fake_probability[known] = verdicts[known]
+            stages[known] = 'feedback'
+
+        _, scores, fired = self.rule_set.predict_codes(codes)
+        real_below, fake_above = self.rule_bands
+        for decided, label in ((scores <= real_below, 0), (scores >= fake_above, 1)):
+            decided &= predictions < 0
+            predictions[decided] = label
+            fake_probability[decided] = label
+            stages[decided] = 'rules'
+
+        rest = np.flatnonzero(predictions < 0)
+        if len(rest):
+            model_predictions, model_probability = self._model_stage(codes[rest])
+            predictions[rest] = model_predictions
+            fake_probability[rest] = model_probability
+            stages[rest] = 'model'
+
+            if self.text_model is not None:
+                low, high = self.model_bands
+                texts = _field(postings, TEXT_FIELD)
+                unsure = rest[(model_probability > low) & (model_probability < high)]
+                unsure = np.array([i for i in unsure if _key(texts[i]) is not None], dtype=np.intp)
+                if len(unsure):
+                    text_predictions, text_probability = self._text_stage([texts[i] for i in unsure])
+                    predictions[unsure] = text_predictions
+                    fake_probability[unsure] = text_probability
+                    stages[unsure] = 'text_model'
+
+        with self._lock:
+            self.total += n
+            for stage, count in zip(*np.unique(stages.astype(str), return_counts=True)):
+                self.counts[stage] += int(count)
+        return predictions, fake_probability, stages, fired
+
+    # Whether one posting looks fake, the stage that decided it and the rules it fired
+    def check(self, posting):
+        predictions, _, stages, fired = self.predict(posting)
+        return bool(predictions[0]), stages[0], self.rule_set.fired_descriptions(fired[0])
+
+    # Postings decided per stage and the share of all postings that represents
+    def stats(self):
+        with self._lock:
+            return {stage: {'count': count, 'rate': count / self.total if self.total else 0.0}
+                    for stage, count in self.counts.items()}
+
+
+# Cascade of the app pages: feedback from the shared store, default rules and the
+# cached model, built once per process
+@lru_cache(maxsize=None)
+def shared_cascade(model_path=DEFAULT_MODEL_PATH):
+    from storage import get_store
+    return Cascade(model_path, store=get_store())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score postings with the feedback, rules, model cascade.')
+    parser.add_argument('input', help='csv with the fake_job_postings.csv columns')
+    parser.add_argument('-o', '--output', default='cascade_predictions.csv', help='where to write the predictions')
+    parser.add_argument('-m', '--model', default=DEFAULT_MODEL_PATH, help='pickled classifier')
+    parser.add_argument('--db', default=None, help='SQLite store to look up feedback in')
+    parser.add_argument('--rule-bands', type=float, nargs=2, default=DEFAULT_RULE_BANDS, metavar=('REAL', 'FAKE'),
+                        help='rule scores at or below REAL are real, at or above FAKE fake')
+    parser.add_argument('--text-model', default=None, help='text model artifact or directory for uncertain postings')
+    parser.add_argument('--model-bands', type=float, nargs=2, default=DEFAULT_MODEL_BANDS, metavar=('LOW', 'HIGH'),
+                        help='model fake probabilities between LOW and HIGH go to the text model')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    store = text_model = None
+    if args.db:
+        from storage import get_store
+        store = get_store(args.db)
+    header = pd.read_csv(args.input, nrows=0).columns
+    usecols = posting_columns(args.input) + [field for field in (LINK_FIELD, COMPANY_FIELD) if field in header]
+    if args.text_model:
+        from dataset_cache import TEXT_COLUMNS, build_text
+        from text_model import load_artifact
+        text_model = load_artifact(args.text_model)
+        usecols += [column for column in TEXT_COLUMNS if column in header and column not in usecols]
+    cascade = Cascade(args.model, store, rule_bands=tuple(args.rule_bands), text_model=text_model,
+                      model_bands=tuple(args.model_bands), use_cache=False)
+
+    start = time.perf_counter()
+    rows = 0
+    with open(args.output, 'w', newline='') as out:
+        for chunk in read_postings(args.input, args.chunksize, usecols):
+            if text_model is not None:
+                chunk[TEXT_FIELD] = build_text(chunk.reindex(columns=chunk.columns.union(TEXT_COLUMNS, sort=False)))
+            predictions, fake_probability, stages, _ = cascade.predict(chunk)
+            pd.DataFrame({
+                ID_COLUMN: chunk[ID_COLUMN].to_numpy(),
+                'prediction': predictions,
+                'label': label_names(predictions),
+                'fake_probability': fake_probability,
+                'stage': stages,
+            }).to_csv(out, header=rows == 0, index=False)
+            rows += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} postings in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s -> {args.output}",
+          file=sys.stderr)
+    for stage, counts in cascade.stats().items():
+        print(f"  {stage}: {counts['count']} ({counts['rate']:.1%})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
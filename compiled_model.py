@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from feature_encoder import BINARY_FIELDS, CATEGORICAL_FIELDS, FIELDS, FeatureEncoder, default_encoder
+from model_loader import DEFAULT_MODEL_PATH, file_digest, load_model
+from scoring import predict_block
+
+# Number of categories of every field, in FIELDS order. A posting's row in the
+# lookup table is its category codes read as a mixed-radix number.
+RADICES = tuple([2] * len(BINARY_FIELDS) + [len(options) for options in CATEGORICAL_FIELDS.values()])
+DOMAIN_SIZE = int(np.prod(RADICES))
+
+TABLE_DTYPE = np.dtype([('prediction', 'i1'), ('fake_probability', 'f4')])
+DEFAULT_BATCH_SIZE = 100000
+
+
+def table_index(codes):
+    return np.ravel_multi_index(np.asarray(codes, dtype=np.intp).T, RADICES)
+
+
+def domain_codes(start, stop):
+    return np.stack(np.unravel_index(np.arange(start, stop), RADICES), axis=1)
+
+
+def _metadata_path(path):
+    return path + '.json'
+
+
+# Score every possible posting with the model and write the results to path as a
+# memory-mappable .npy table with a json sidecar describing where it came from
+def compile_model(model_path, path, batch_size=DEFAULT_BATCH_SIZE):
+    # Only building the table unpickles the estimator (and imports scikit-learn)
+    model = load_model(model_path)
+    encoder = FeatureEncoder.for_model(model)
+    table = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=TABLE_DTYPE, shape=(DOMAIN_SIZE,))
+    buffer = np.empty((batch_size, encoder.n_features))
+    for start in range(0, DOMAIN_SIZE, batch_size):
+        stop = min(start + batch_size, DOMAIN_SIZE)
+        X = encoder.encode_codes(domain_codes(start, stop), out=buffer)
+        predictions, fake_probability = predict_block(model, X)
+        table['prediction'][start:stop] = predictions
+        table['fake_probability'][start:stop] = fake_probability
+    table.flush()
+    del table
+    os.replace(path + '.tmp', path)
+
+    metadata = {'model_sha256': file_digest(model_path), 'fields': list(FIELDS), 'radices': list(RADICES)}
+    with open(_metadata_path(path), 'w') as f:
+        json.dump(metadata, f)
+    return CompiledModel(path)
+
+
+# Serves predictions from a compiled table: one array lookup per posting,
+# no scikit-learn at serve time
+class CompiledModel:
+    def __init__(self, path):
+        with open(_metadata_path(path)) as f:
+            self.metadata = json.load(f)
+        if tuple(self.metadata['radices']) != RADICES or self.metadata['fields'] != list(FIELDS):
+            raise ValueError(f"{path} was compiled for a different set of categories")
+        self.path = path
+        self.table = np.load(path, mmap_mode='r')
+
+    @property
+    def model_sha256(self):
+        return self.metadata['model_sha256']
+
+    # (predictions, fake_probability) for an (n, 8) array of category codes
+    def predict_codes(self, codes):
+        rows = self.table[table_index(codes)]
+        return rows['prediction'].astype(np.int64), rows['fake_probability'].astype(np.float64)
+
+    def predict_postings(self, postings):
+        return self.predict_codes(default_encoder().codes(postings))
+
+
+# Load the table for model_path, compiling it first when it is missing or stale
+def load_or_compile(model_path, path, batch_size=DEFAULT_BATCH_SIZE):
+    if os.path.exists(path) and os.path.exists(_metadata_path(path)):
+        compiled = CompiledModel(path)
+        if compiled.model_sha256 == file_digest(model_path):
+            return compiled
+    return compile_model(model_path, path, batch_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute predictions for every possible posting.')
+    parser.add_argument('-m', '--model', default=DEFAULT_MODEL_PATH, help='pickled classifier')
+    parser.add_argument('-o', '--output', default='job_posting.table.npy', help='where to write the lookup table')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='postings scored per model call')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    compile_model(args.model, args.output, args.batch_size)
+    print(f"Compiled {DOMAIN_SIZE} postings in {time.perf_counter() - start:.1f}s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from feature_encoder import BINARY_FIELDS, CATEGORICAL_FIELDS
+from model_loader import file_digest
+
+DEFAULT_SOURCE_PATH = 'fake_job_postings.csv'
+DEFAULT_CACHE_PATH = 'fake_job_postings.parquet'
+
+# Free text columns the notebook concatenates into data['text']
+TEXT_COLUMNS = ['title', 'location', 'department', 'company_profile', 'description',
+                'requirements', 'benefits', 'industry']
+TEXT_COLUMN = 'text'
+TARGET_COLUMN = 'fraudulent'
+
+# Low cardinality columns stored dictionary encoded
+CATEGORY_COLUMNS = list(CATEGORICAL_FIELDS) + ['country']
+
+# Schema metadata key holding the sha256 of the csv the cache was prepared from
+SOURCE_SHA_KEY = b'source_sha256'
+
+
+# data['text'] of the notebook: the text columns joined by spaces, blanks for
+# missing values. Frames read from the cache already carry it.
+def build_text(frame):
+    if TEXT_COLUMN in frame:
+        return frame[TEXT_COLUMN]
+    # object first, so categorical columns (industry) can take the blank too
+    text = frame[TEXT_COLUMNS[0]].astype(object).fillna(' ').astype(str)
+    for column in TEXT_COLUMNS[1:]:
+        text = text + ' ' + frame[column].astype(object).fillna(' ').astype(str)
+    return text
+
+
+# The notebook's cleaning in one pass: blanks for missing text, the country taken
+# from the location, the combined text column, compact types for flags and categories
+def clean_dataset(frame):
+    frame = frame.copy()
+    text_like = frame.select_dtypes(include='object').columns
+    frame[text_like] = frame[text_like].fillna(' ')
+    frame['country'] = frame['location'].astype(str).str.split(',').str[0]
+    frame[TEXT_COLUMN] = build_text(frame)
+    for column in BINARY_FIELDS + (TARGET_COLUMN,):
+        if column in frame:
+            frame[column] = frame[column].astype('int8')
+    for column in CATEGORY_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+# sha256 of the csv the cache at path was prepared from, None when there is no cache
+def cached_source_sha(path=DEFAULT_CACHE_PATH):
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    sha = metadata.get(SOURCE_SHA_KEY)
+    return sha.decode() if sha else None
+
+
+# Write the cleaned dataset to path as Parquet, unless it was already prepared from
+# this exact source. Returns True when the cache was (re)written.
+def prepare_dataset(source=DEFAULT_SOURCE_PATH, path=DEFAULT_CACHE_PATH, force=False):
+    digest = file_digest(source)
+    if not force and cached_source_sha(path) == digest:
+        return False
+
+    table = pa.Table.from_pandas(clean_dataset(pd.read_csv(source)), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_SHA_KEY] = digest.encode()
+    table = table.replace_schema_metadata(metadata)
+    # Written under a temporary name and renamed, readers never see a partial file
+    pq.write_table(table, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return True
+
+
+# Read only the given columns of the cache, memory-mapped
+def read_dataset(path=DEFAULT_CACHE_PATH, columns=None):
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+# The cache as DataFrames of at most batch_size rows, for out of core training
+def iter_dataset(path=DEFAULT_CACHE_PATH, columns=None, batch_size=50000):
+    parquet = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prepare the cleaned Parquet cache of the job postings dataset.')
+    parser.add_argument('source', nargs='?', default=DEFAULT_SOURCE_PATH, help='fake_job_postings.csv')
+    parser.add_argument('-o', '--output', default=DEFAULT_CACHE_PATH, help='where to write the Parquet cache')
+    parser.add_argument('--force', action='store_true', help='rewrite the cache even if the source is unchanged')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if prepare_dataset(args.source, args.output, args.force):
+        print(f"Prepared {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        print(f"{args.output} is up to date with {args.source}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from model_loader import DEFAULT_MODEL_PATH, load_model
+from numpy_model import load_numpy_model
+
+DEFAULT_VERIFY_ROWS = 10000
+
+
+def _tree_arrays(model):
+    tree = model.tree_
+    return {
+        'kind': 'tree',
+        'children_left': tree.children_left.astype(np.int32),
+        'children_right': tree.children_right.astype(np.int32),
+        'feature': tree.feature.astype(np.int32),
+        'threshold': tree.threshold,
+        'value': tree.value[:, 0, :],
+        'max_depth': tree.max_depth,
+    }
+
+
+def _naive_bayes_arrays(model):
+    return {'kind': 'nb', 'feature_log_prob': model.feature_log_prob_, 'class_log_prior': model.class_log_prior_}
+
+
+def _linear_arrays(model):
+    if len(model.classes_) > 2 and getattr(model, 'multi_class', 'auto') == 'ovr':
+        raise ValueError('Only binary or multinomial logistic regression can be exported')
+    return {'kind': 'linear', 'coef': model.coef_, 'intercept': model.intercept_}
+
+
+# Arrays needed to predict with a fitted estimator, see numpy_model.py
+def export_arrays(model):
+    name = type(model).__name__
+    if name == 'DecisionTreeClassifier':
+        arrays = _tree_arrays(model)
+    elif name == 'MultinomialNB':
+        arrays = _naive_bayes_arrays(model)
+    elif name == 'LogisticRegression':
+        arrays = _linear_arrays(model)
+    else:
+        raise ValueError(f"Cannot export {name}, expected DecisionTreeClassifier, MultinomialNB or LogisticRegression")
+
+    arrays['classes'] = model.classes_
+    arrays['n_features'] = model.n_features_in_
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is not None:
+        arrays['feature_names'] = np.asarray(feature_names, dtype=str)
+    return arrays
+
+
+# Raise unless the exported model predicts exactly like the estimator on X
+def verify_export(model, exported, X):
+    if not np.array_equal(model.predict(X), exported.predict(X)):
+        raise ValueError('Exported model predictions differ from the original model')
+    if not np.allclose(model.predict_proba(X), exported.predict_proba(X)):
+        raise ValueError('Exported model probabilities differ from the original model')
+
+
+# Write the model at model_path as an .npz file of plain arrays, checked against
+# the original on verify_rows random binary rows (the features of the app are
+# one-hot flags). Returns the exported predictor.
+def export_model(model_path=DEFAULT_MODEL_PATH, path=None, verify_rows=DEFAULT_VERIFY_ROWS, seed=0):
+    path = path or os.path.splitext(model_path)[0] + '.npz'
+    model = load_model(model_path)
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, **export_arrays(model))
+    exported = load_numpy_model(path + '.tmp')
+    if verify_rows:
+        X = np.random.default_rng(seed).integers(0, 2, size=(verify_rows, model.n_features_in_)).astype(np.float64)
+        if getattr(model, 'feature_names_in_', None) is not None:
+            X = pd.DataFrame(X, columns=model.feature_names_in_)
+        try:
+            verify_export(model, exported, X)
+        except ValueError:
+            os.remove(path + '.tmp')
+            raise
+    os.replace(path + '.tmp', path)
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a classifier to an inference-only NumPy .npz file.')
+    parser.add_argument('-m', '--model', default=DEFAULT_MODEL_PATH, help='pickled classifier')
+    parser.add_argument('-o', '--output', default=None, help='where to write the .npz, next to the model by default')
+    parser.add_argument('--verify-rows', type=int, default=DEFAULT_VERIFY_ROWS,
+                        help='random rows the export is checked on, 0 to skip')
+    args = parser.parse_args(argv)
+
+    exported = export_model(args.model, args.output, args.verify_rows)
+    path = args.output or os.path.splitext(args.model)[0] + '.npz'
+    print(f"Exported {exported.kind} model ({os.path.getsize(path)} bytes) -> {path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Options offered by the selectboxes of the app pages, in display order
+EMPLOYMENT_TYPES = ('Not Specified', 'Other', 'Part-time', 'Contract', 'Temporary', 'Full-time')
+
+REQUIRED_EXPERIENCE = ('Not Applicable', 'Internship', 'Entry level', 'Mid-Senior level',
+                       'Associate', 'Executive', 'Director')
+
+REQUIRED_EDUCATION = ('Unspecified', 'Vocational - HS Diploma', 'Some High School Coursework',
+                      'High School or equivalent', 'Some College Coursework Completed', 'Certification',
+                      'Vocational', 'Vocational - Degree', "Bachelor's Degree", "Master's Degree",
+                      'Associate Degree', 'Professional', 'Doctorate')
+
+INDUSTRIES = ('Not Specified', 'Marketing and Advertising', 'Computer Software',
+              'Hospital & Health Care', 'Online Media',
+              'Information Technology and Services', 'Financial Services',
+              'Management Consulting', 'Internet',
+              'Telecommunications', 'Consumer Services', 'Construction',
+              'Oil & Energy', 'Education Management',
+              'Health, Wellness and Fitness', 'Insurance', 'E-Learning',
+              'Staffing and Recruiting', 'Human Resources', 'Real Estate',
+              'Automotive', 'Logistics and Supply Chain', 'Design', 'Accounting',
+              'Retail', 'Others')
+
+FUNCTIONS = ('Not Specified', 'Marketing', 'Customer Service', 'Sales',
+             'Health Care Provider', 'Management', 'Information Technology',
+             'Engineering', 'Administrative', 'Design', 'Production',
+             'Education', 'Business Development', 'Product Management',
+             'Consulting', 'Human Resources', 'Project Management', 'Finance',
+             'Accounting/Auditing', 'Art/Creative', 'Quality Assurance',
+             'Writing/Editing', 'Other')
+
+BINARY_FIELDS = ('telecommuting', 'has_company_logo', 'has_questions')
+
+CATEGORICAL_FIELDS = {
+    'employment_type': EMPLOYMENT_TYPES,
+    'required_experience': REQUIRED_EXPERIENCE,
+    'required_education': REQUIRED_EDUCATION,
+    'industry': INDUSTRIES,
+    'function': FUNCTIONS,
+}
+
+# The eight inputs of a posting, in the order used for category codes
+FIELDS = BINARY_FIELDS + tuple(CATEGORICAL_FIELDS)
+
+# Category used when a posting leaves a field empty
+DEFAULTS = {
+    'employment_type': 'Not Specified',
+    'required_experience': 'Not Applicable',
+    'required_education': 'Unspecified',
+    'industry': 'Not Specified',
+    'function': 'Not Specified',
+}
+
+# Catch-all category for values the app does not offer (the old else branches)
+FALLBACKS = {
+    'industry': 'Others',
+    'function': 'Other',
+}
+
+_TRUE_VALUES = {1, True, 'Yes', 'yes', 'Y', 'y', 'True', 'true', 't', '1'}
+
+
+# Column names of the training frame: pd.get_dummies(drop_first=True) keeps
+# every category except the alphabetically first one of each field
+def training_columns():
+    columns = list(BINARY_FIELDS)
+    for field, options in CATEGORICAL_FIELDS.items():
+        columns += [f'{field}_{option}' for option in sorted(options)[1:]]
+    return columns
+
+
+FEATURE_COLUMNS = tuple(training_columns())
+
+
+# Column names may have been written with punctuation replaced by underscores
+# (employment_type_Full_time), so columns are matched on this normalized form
+def _column_key(name):
+    return re.sub(r'\W', '_', str(name))
+
+
+def _is_missing(value):
+    return value is None or value != value or (isinstance(value, str) and not value.strip())
+
+
+# Turns postings into the one-hot rows the classifier was trained on.
+# All lookup tables are built once, encoding is a handful of index writes.
+class FeatureEncoder:
+    def __init__(self, columns=None):
+        self.columns = tuple(FEATURE_COLUMNS if columns is None else columns)
+        self.n_features = len(self.columns)
+        index = {_column_key(name): i for i, name in enumerate(self.columns)}
+
+        try:
+            self._binary_columns = np.array([index[field] for field in BINARY_FIELDS], dtype=np.intp)
+        except KeyError as exc:
+            raise ValueError(f"Training schema has no column for {exc.args[0]}") from None
+
+        # Per field: option -> category code, and category code -> column (-1 for the dropped baseline)
+        self._codes = {}
+        self._code_columns = []
+        for field, options in CATEGORICAL_FIELDS.items():
+            self._codes[field] = {option: code for code, option in enumerate(options)}
+            self._code_columns.append(np.array(
+                [index.get(_column_key(f'{field}_{option}'), -1) for option in options], dtype=np.intp))
+
+        known = set(self._binary_columns.tolist())
+        for columns in self._code_columns:
+            known.update(columns[columns >= 0].tolist())
+        if len(known) != self.n_features:
+            unknown = [name for i, name in enumerate(self.columns) if i not in known]
+            raise ValueError(f"Unknown training columns: {unknown}")
+
+    # Use the column order stored on a fitted estimator when it has one
+    @classmethod
+    def for_model(cls, model):
+        columns = getattr(model, 'feature_names_in_', None)
+        if columns is not None:
+            return _encoder_for_columns(tuple(columns))
+        n_features = getattr(model, 'n_features_in_', len(FEATURE_COLUMNS))
+        if n_features != len(FEATURE_COLUMNS):
+            raise ValueError(f"Model expects {n_features} features, the encoder produces {len(FEATURE_COLUMNS)}")
+        return default_encoder()
+
+    # Category code of a single value
+    def code(self, field, value):
+        if field in BINARY_FIELDS:
+            return int(value in _TRUE_VALUES)
+        codes = self._codes[field]
+        if _is_missing(value):
+            return codes[DEFAULTS[field]]
+        code = codes.get(value)
+        if code is None:
+            code = codes[FALLBACKS.get(field, DEFAULTS[field])]
+        return code
+
+    # (n, 8) array of category codes, one column per entry of FIELDS.
+    # Accepts a dict, a list of dicts or a DataFrame with the dataset column names.
+    def codes(self, postings):
+        if isinstance(postings, dict):
+            postings = [postings]
+        if hasattr(postings, 'columns'):
+            return self._frame_codes(postings)
+        codes = np.empty((len(postings), len(FIELDS)), dtype=np.int16)
+        for row, posting in enumerate(postings):
+            for j, field in enumerate(FIELDS):
+                codes[row, j] = self.code(field, posting.get(field))
+        return codes
+
+    def _frame_codes(self, frame):
+        codes = np.empty((len(frame), len(FIELDS)), dtype=np.int16)
+        for j, field in enumerate(BINARY_FIELDS):
+            column = frame[field]
+            if column.dtype.kind in 'biuf':
+                codes[:, j] = column.fillna(0).to_numpy() != 0
+            else:
+                codes[:, j] = column.astype(object).isin(_TRUE_VALUES).to_numpy()
+        for j, field in enumerate(CATEGORICAL_FIELDS, start=len(BINARY_FIELDS)):
+            column = frame[field]
+            mapped = column.map(self._codes[field])
+            if hasattr(mapped, 'cat'):
+                mapped = mapped.astype(object)
+            missing = column.isna().to_numpy() | (column.astype(str).str.strip() == '').to_numpy()
+            fallback = self._codes[field][FALLBACKS.get(field, DEFAULTS[field])]
+            values = mapped.fillna(fallback).to_numpy(dtype=np.int16)
+            values[missing] = self._codes[field][DEFAULTS[field]]
+            codes[:, j] = values
+        return codes
+
+    # One-hot matrix from category codes, written into out when given
+    def encode_codes(self, codes, out=None, dtype=np.float64):
+        n = len(codes)
+        if out is None:
+            out = np.zeros((n, self.n_features), dtype=dtype)
+        else:
+            out = out[:n]
+            out.fill(0)
+        out[:, self._binary_columns] = codes[:, :len(BINARY_FIELDS)]
+        rows = np.arange(n)
+        for j, columns in enumerate(self._code_columns, start=len(BINARY_FIELDS)):
+            target = columns[codes[:, j]]
+            hit = target >= 0
+            out[rows[hit], target[hit]] = 1
+        return out
+
+    # Feature matrix for one or many postings
+    def encode(self, postings, out=None, dtype=np.float64):
+        return self.encode_codes(self.codes(postings), out=out, dtype=dtype)
+
+    # Single (1, n_features) row for the interactive pages, no intermediate arrays
+    def encode_row(self, posting, out=None, dtype=np.float64):
+        if out is None:
+            out = np.zeros((1, self.n_features), dtype=dtype)
+        else:
+            out.fill(0)
+        row = out[0]
+        for field, column in zip(BINARY_FIELDS, self._binary_columns):
+            row[column] = self.code(field, posting.get(field))
+        for field, columns in zip(CATEGORICAL_FIELDS, self._code_columns):
+            column = columns[self.code(field, posting.get(field))]
+            if column >= 0:
+                row[column] = 1
+        return out
+
+
+# Encoder with the default training schema, built once per process
+@lru_cache(maxsize=None)
+def default_encoder():
+    return FeatureEncoder()
+
+
+@lru_cache(maxsize=8)
+def _encoder_for_columns(columns):
+    return FeatureEncoder(columns)
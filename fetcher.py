@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds, and the most a whole download may take
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_DEADLINE = 20
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_CACHE_SIZE = 256
+# Total size of the cached bodies; a single body over a quarter of it is not cached
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# Cached responses younger than this are served without asking the server again
+DEFAULT_MAX_AGE = 60
+DEFAULT_POOL_SIZE = 16
+CHUNK_SIZE = 64 * 1024
+
+
+class FetchError(Exception):
+    def __init__(self, url, message, status=None):
+        super().__init__(f"{url}: {message}")
+        self.url = url
+        self.status = status
+
+
+# A fetched response body with the validators needed to revalidate it
+class FetchResult:
+    def __init__(self, url, content, content_type, etag=None, last_modified=None):
+        self.url = url
+        self.content = content
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+
+    @property
+    def is_image(self):
+        return self.content_type.startswith('image/')
+
+
+# Fetches posting links over a pooled keep-alive session with hard timeouts.
+# Bodies are kept in an LRU keyed by URL and bounded by entries and by total
+# bytes, so large screenshots cannot pile up in memory: fresh entries are returned as
+# they are, older ones are revalidated with If-None-Match / If-Modified-Since so
+# an unchanged page costs a 304 instead of a download. Bodies larger than
+# max_bytes are refused while streaming, before they are held in memory.
+class Fetcher:
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, max_bytes=DEFAULT_MAX_BYTES, timeout=DEFAULT_TIMEOUT,
+                 deadline=DEFAULT_DEADLINE, max_age=DEFAULT_MAX_AGE, pool_size=DEFAULT_POOL_SIZE, session=None,
+                 cache_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self._cached_bytes = 0
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_age = max_age
+        self.pool_size = pool_size
+        self.session = session or self._make_session(pool_size)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._readers = None
+        self.hits = self.revalidated = self.misses = self.errors = 0
+
+    @staticmethod
+    def _make_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = 'job-posting-classifier/1.0'
+        return session
+
+    def _cached(self, url):
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached is not None:
+                self._cache.move_to_end(url)
+            return cached
+
+    def _store(self, result):
+        with self._lock:
+            previous = self._cache.pop(result.url, None)
+            if previous is not None:
+                self._cached_bytes -= len(previous.content)
+            if len(result.content) > self.cache_bytes // 4:
+                return
+            self._cache[result.url] = result
+            self._cached_bytes += len(result.content)
+            while len(self._cache) > self.cache_size or self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.content)
+
+    def _read_chunks(self, url, response):
+        chunks, size = [], 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise FetchError(url, f"response is over the {self.max_bytes} byte limit")
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    # Shut the socket down under a reader blocked in the middle of a chunk, so it
+    # gives up instead of trickling on in the background
+    @staticmethod
+    def _abort(response):
+        sock = getattr(getattr(response.raw, '_connection', None), 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        response.close()
+
+    # The read timeout applies per socket read, and a read only returns once a
+    # whole chunk has arrived, so a slow trickle never trips it. The body is read
+    # on a reader thread and waited for with the deadline instead.
+    def _read_body(self, url, response):
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise FetchError(url, f"response of {length} bytes is over the {self.max_bytes} byte limit")
+        with self._lock:
+            if self._readers is None:
+                self._readers = ThreadPoolExecutor(self.pool_size, thread_name_prefix='fetcher-read')
+        future = self._readers.submit(self._read_chunks, url, response)
+        try:
+            return future.result(timeout=self.deadline)
+        except FutureTimeout:
+            self._abort(response)
+            raise FetchError(url, f"download took longer than {self.deadline}s") from None
+
+    # FetchResult for url, from the cache when possible. Raises FetchError for
+    # timeouts, connection failures, non 200 responses and oversized bodies.
+    def get(self, url):
+        cached = self._cached(url)
+        if cached is not None and time.monotonic() - cached.fetched_at < self.max_age:
+            self.hits += 1
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    cached.fetched_at = time.monotonic()
+                    self.revalidated += 1
+                    return cached
+                if response.status_code != 200:
+                    raise FetchError(url, f"HTTP {response.status_code}", response.status_code)
+                content = self._read_body(url, response)
+                result = FetchResult(url, content, response.headers.get('Content-Type', ''),
+                                     response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        except requests.RequestException as exc:
+            self.errors += 1
+            raise FetchError(url, str(exc)) from exc
+        except FetchError:
+            self.errors += 1
+            raise
+        self.misses += 1
+        self._store(result)
+        return result
+
+    # Fetch many links concurrently on the event loop's executor. Returns one
+    # FetchResult or FetchError per url, in order; one slow site only holds up
+    # its own slot.
+    async def get_many_async(self, urls):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix='fetcher')
+        loop = asyncio.get_running_loop()
+        tasks = [loop.run_in_executor(self._executor, self.get, url) for url in urls]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_many(self, urls):
+        return asyncio.run(self.get_many_async(urls))
+
+    def stats(self):
+        return {'entries': len(self._cache), 'bytes': self._cached_bytes, 'hits': self.hits, 'revalidated': self.revalidated,
+                'misses': self.misses, 'errors': self.errors}
+
+    def close(self):
+        for executor in (self._executor, self._readers):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._executor = self._readers = None
+        self.session.close()
+
+
+# Fetcher shared by every session of the process, so its connection pool and
+# cache survive Streamlit reruns
+@lru_cache(maxsize=None)
+def shared_fetcher():
+    return Fetcher()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fetch job posting links concurrently.')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args(argv)
+
+    fetcher = Fetcher(max_bytes=args.max_bytes)
+    start = time.perf_counter()
+    for url, result in zip(args.urls, fetcher.get_many(args.urls)):
+        if isinstance(result, Exception):
+            print(f"{url}\terror\t{result}")
+        else:
+            print(f"{url}\t{result.content_type}\t{len(result.content)} bytes")
+    fetcher.close()
+    print(f"Fetched {len(args.urls)} links in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image
+
+DEFAULT_CACHE_DIR = '.image_cache'
+# Largest width and height of a thumbnail; the page column is narrower than this
+THUMBNAIL_SIZE = (1024, 1024)
+DEFAULT_MEMORY_ITEMS = 64
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+JPEG_QUALITY = 85
+
+
+# Decode image bytes at reduced size and encode a thumbnail that fits in size.
+# draft() lets the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding, so a
+# large screenshot is never expanded to full resolution; other formats decode
+# normally and are then shrunk. Returns (encoded bytes, format).
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    with Image.open(BytesIO(data)) as image:
+        image.draft('RGB', size)
+        image.thumbnail(size)
+        # Anything with an alpha band or a transparent palette entry keeps it as a PNG
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        if transparent and image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        elif not transparent and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        out = BytesIO()
+        if transparent:
+            image.save(out, format='PNG', optimize=True)
+            return out.getvalue(), 'PNG'
+        image.save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        return out.getvalue(), 'JPEG'
+
+
+# Thumbnails keyed by the sha256 of the original bytes and the thumbnail size.
+# Recent thumbnails are kept in memory, all of them on disk so they survive
+# restarts; the least recently used files are removed once the directory grows
+# past disk_bytes.
+class ImageCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, size=THUMBNAIL_SIZE, memory_items=DEFAULT_MEMORY_ITEMS,
+                 disk_bytes=DEFAULT_DISK_BYTES):
+        self.directory = directory
+        self.size = tuple(size)
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        # _lock guards the memory LRU and the counters, _disk_lock the size
+        # accounting and eviction of the files; neither is held while decoding
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._disk_used = sum(os.path.getsize(path) for path in self._files())
+        self.hits = self.disk_hits = self.misses = 0
+
+    def key(self, data):
+        return f"{hashlib.sha256(data).hexdigest()}_{self.size[0]}x{self.size[1]}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.thumb')
+
+    def _files(self):
+        return [entry.path for entry in os.scandir(self.directory) if entry.name.endswith('.thumb')]
+
+    def _remember(self, key, thumbnail):
+        with self._lock:
+            self._memory[key] = thumbnail
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _write(self, key, thumbnail):
+        # A thumbnail bigger than the whole budget would only evict everything else
+        if len(thumbnail) > self.disk_bytes:
+            return
+        path = self._path(key)
+        # A per thread temporary name, two sessions may write the same thumbnail at once
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(thumbnail)
+        with self._disk_lock:
+            # Replacing a thumbnail another session just wrote does not grow the cache
+            replaced = os.path.exists(path)
+            os.replace(tmp, path)
+            if not replaced:
+                self._disk_used += len(thumbnail)
+            if self._disk_used > self.disk_bytes:
+                self._evict(keep=path)
+
+    # Remove the least recently used files until the cache is back under 90% of
+    # disk_bytes, never the file at keep that was just written
+    def _evict(self, keep=None):
+        files = sorted(self._files(), key=os.path.getmtime)
+        self._disk_used = sum(os.path.getsize(path) for path in files)
+        for path in files:
+            if path == keep:
+                continue
+            if self._disk_used <= self.disk_bytes * 0.9:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._disk_used -= size
+
+    # Encoded thumbnail of the image bytes. Only the memory lookup holds the lock;
+    # disk reads and decoding run outside it so one large upload does not stall
+    # the other sessions. Concurrent misses of the same image may both decode it.
+    def thumbnail(self, data):
+        key = self.key(data)
+        with self._lock:
+            thumbnail = self._memory.get(key)
+            if thumbnail is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return thumbnail
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                thumbnail = f.read()
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+            hit = True
+        except FileNotFoundError:
+            thumbnail, _ = make_thumbnail(data, self.size)
+            self._write(key, thumbnail)
+            hit = False
+        with self._lock:
+            if hit:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        self._remember(key, thumbnail)
+        return thumbnail
+
+    def stats(self):
+        return {'memory_items': len(self._memory), 'disk_bytes': self._disk_used, 'hits': self.hits,
+                'disk_hits': self.disk_hits, 'misses': self.misses}
+
+
+# Cache shared by every session of the process
+@lru_cache(maxsize=None)
+def shared_image_cache(directory=DEFAULT_CACHE_DIR):
+    return ImageCache(directory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build cached thumbnails of posting screenshots.')
+    parser.add_argument('images', nargs='+', help='image files')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    cache = ImageCache(args.cache_dir)
+    for path in args.images:
+        with open(path, 'rb') as f:
+            data = f.read()
+        start = time.perf_counter()
+        thumbnail = cache.thumbnail(data)
+        print(f"{path}: {len(data)} -> {len(thumbnail)} bytes in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(cache.stats(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
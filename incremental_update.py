@@ -0,0 +1,75 @@
+import argparse
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from storage import DEFAULT_DB_PATH, get_store
+from text_model import DEFAULT_ARTIFACT_DIR, latest_artifact, save_artifact
+
+# Answers of "Was this a real job posting?" that can be learned from; 'Unsure' is skipped
+FEEDBACK_LABELS = {'Yes': 0, 'No': 1}
+DEFAULT_BATCH_SIZE = 5000
+
+
+# Feedback rows after the watermark, batch_size rows at a time
+def iter_feedback(store, watermark=0, batch_size=DEFAULT_BATCH_SIZE):
+    while True:
+        rows = store.feedback_since(watermark, limit=batch_size)
+        if not rows:
+            return
+        yield rows
+        watermark = rows[-1]['id']
+
+
+# Text and label of the rows that carry a usable answer. The feedback form only
+# collects the company name and a reference link, so those are the text.
+def feedback_examples(rows):
+    frame = pd.DataFrame(rows)
+    frame = frame[frame['is_real_posting'].isin(list(FEEDBACK_LABELS))]
+    texts = frame['company_name'].fillna('') + ' ' + frame['reference_link'].fillna('')
+    labels = frame['is_real_posting'].map(FEEDBACK_LABELS).to_numpy(dtype=np.int64)
+    return texts, labels
+
+
+# Update the newest text model with the feedback received since it was trained
+# and publish the result as a new artifact version. Returns the new artifact
+# path, or None when there was nothing new to learn from.
+def update_from_feedback(artifact_dir=DEFAULT_ARTIFACT_DIR, store=None, batch_size=DEFAULT_BATCH_SIZE):
+    store = store or get_store()
+    # A private copy: the cached artifact may be serving predictions in this process
+    with open(latest_artifact(artifact_dir), 'rb') as f:
+        classifier = pickle.load(f)
+    if not hasattr(classifier.model, 'partial_fit'):
+        raise ValueError(f"{classifier.classifier_name} models cannot be updated incrementally, retrain instead")
+
+    watermark = classifier.feedback_watermark
+    learned = 0
+    for rows in iter_feedback(store, watermark, batch_size):
+        texts, labels = feedback_examples(rows)
+        if len(labels):
+            classifier.model.partial_fit(classifier.transform(texts), labels)
+            learned += len(labels)
+        watermark = rows[-1]['id']
+
+    if watermark == classifier.feedback_watermark:
+        return None
+    classifier.feedback_watermark = watermark
+    classifier.metrics = dict(classifier.metrics, feedback_rows=classifier.metrics.get('feedback_rows', 0) + learned)
+    return save_artifact(classifier, artifact_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Update the text model with new posting feedback.')
+    parser.add_argument('--models', default=DEFAULT_ARTIFACT_DIR, help='directory of versioned text model artifacts')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite store with the feedback')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='feedback rows per partial_fit')
+    args = parser.parse_args(argv)
+
+    path = update_from_feedback(args.models, get_store(args.db), args.batch_size)
+    print(f"Published {path}" if path else "No new feedback", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from feature_encoder import BINARY_FIELDS, CATEGORICAL_FIELDS, FIELDS
+
+ID_COLUMN = 'job_id'
+DEFAULT_CHUNKSIZE = 50000
+
+# Compact dtypes for the projected columns. The flags stay floats so missing
+# values survive parsing, the categorical fields are stored as small integer codes.
+POSTING_DTYPES = dict(
+    [(field, 'float32') for field in BINARY_FIELDS] +
+    [(field, 'category') for field in CATEGORICAL_FIELDS]
+)
+
+
+# Columns of the csv the model needs, failing early when a field is absent
+def posting_columns(path):
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [field for field in FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    return list(FIELDS) + ([ID_COLUMN] if ID_COLUMN in header else [])
+
+
+# Yield the postings of a csv chunk by chunk. Only the model's columns are parsed,
+# so the large free text columns (company_profile, description, ...) never reach memory.
+def read_postings(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None):
+    usecols = posting_columns(path) if usecols is None else list(usecols)
+    dtypes = {column: POSTING_DTYPES[column] for column in usecols if column in POSTING_DTYPES}
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            if ID_COLUMN not in chunk:
+                chunk[ID_COLUMN] = chunk.index
+            yield chunk
+
+
+# Turn a stream of posting chunks into (chunk, features) pairs. Every block is
+# written into one preallocated buffer, so a block is only valid until the next
+# one is requested.
+def encode_chunks(chunks, encoder, chunksize=DEFAULT_CHUNKSIZE, dtype=np.float64):
+    buffer = np.empty((chunksize, encoder.n_features), dtype=dtype)
+    for chunk in chunks:
+        if len(chunk) > len(buffer):
+            buffer = np.empty((len(chunk), encoder.n_features), dtype=dtype)
+        yield chunk, encoder.encode(chunk, out=buffer)
+
+
+# Encoded feature blocks of a csv, read in bounded memory
+def iter_feature_blocks(path, encoder, chunksize=DEFAULT_CHUNKSIZE, dtype=np.float64):
+    return encode_chunks(read_postings(path, chunksize), encoder, chunksize, dtype)
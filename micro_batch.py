@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 5
+
+
+# Marks the result of an item that failed on its own
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+# Coalesces concurrent single item requests into one call of predict_fn.
+# A batch is flushed when it reaches max_batch items or when its first item has
+# waited max_wait_ms, whichever comes first. predict_fn takes a list of items and
+# returns one result per item; it runs on a worker thread so the event loop keeps
+# collecting the next batch while the model is busy.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self.isolated = 0
+        self._pending = []
+        self._timer = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='micro-batch')
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def _flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        items = [item for item, _ in batch]
+        task = loop.run_in_executor(self._executor, self._predict, items)
+        task.add_done_callback(lambda done: self._resolve(batch, done))
+
+    # Results for the items of a batch. When the batch call fails, its items are
+    # scored one at a time, so only the items that fail on their own get the error
+    # and the requests that happened to share their batch still succeed.
+    def _predict(self, items):
+        try:
+            results = self.predict_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"predict_fn returned {len(results)} results for {len(items)} items")
+            return results
+        except Exception:
+            if len(items) == 1:
+                raise
+        self.isolated += 1
+        results = []
+        for item in items:
+            try:
+                results.extend(self._predict([item]))
+            except Exception as exc:
+                results.append(_Failure(exc))
+        return results
+
+    @staticmethod
+    def _resolve(batch, done):
+        error = done.exception()
+        results = None if error else done.result()
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            elif isinstance(results[i], _Failure):
+                future.set_exception(results[i].error)
+            else:
+                future.set_result(results[i])
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'isolated_batches': self.isolated,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# Runs a MicroBatcher on its own event loop thread so that blocking callers,
+# such as the threads of the HTTP server, can share one batcher
+class BackgroundBatcher:
+    def __init__(self, predict_fn, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.batcher = MicroBatcher(predict_fn, max_batch, max_wait_ms)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='micro-batch-loop', daemon=True)
+        self._thread.start()
+
+    # Blocks until the batch containing item has been scored
+    def submit(self, item, timeout=None):
+        return asyncio.run_coroutine_threadsafe(self.batcher.submit(item), self._loop).result(timeout)
+
+    def stats(self):
+        return self.batcher.stats()
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.batcher.close()
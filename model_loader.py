@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+import warnings
+
+DEFAULT_MODEL_PATH = 'job_posting.pkl'
+
+# Process wide cache of deserialized models keyed by absolute path.
+# Streamlit re-executes the page script on every interaction but keeps imported
+# modules alive, so a model kept here is unpickled once per process and the same
+# estimator object is shared by every browser session.
+_models = {}
+_lock = threading.Lock()
+
+
+# Holds a loaded model together with the file state it was loaded from
+class LoadedModel:
+    def __init__(self, model, path, stat_key, digest, load_seconds, memory_bytes, file_bytes, loader=None):
+        self.model = model
+        self.path = path
+        self.stat_key = stat_key
+        self.digest = digest
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.file_bytes = file_bytes
+        # Reused to reload the file after a hot swap, whoever triggers the reload
+        self.loader = loader
+        self.loaded_at = time.time()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Resident set size of the process, None where /proc is not available. Reading it
+# costs nothing during the load, unlike tracing every allocation with tracemalloc.
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Unpickle the file (or hand it to loader), measuring wall time and how much the
+# resident memory grew while loading. The growth includes modules first imported
+# by the unpickle, so it is an upper bound for the estimator itself.
+def _deserialize(path, loader=None):
+    if loader is None and path.endswith('.npz'):
+        # Inference-only export from export_model.py, loads without scikit-learn
+        from numpy_model import load_numpy_model
+        loader = load_numpy_model
+    before = _rss_bytes()
+    start = time.perf_counter()
+    try:
+        if loader is not None:
+            model = loader(path)
+        else:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+    finally:
+        load_seconds = time.perf_counter() - start
+        after = _rss_bytes()
+        memory_bytes = max(after - before, 0) if before is not None and after is not None else None
+    return model, load_seconds, memory_bytes
+
+
+def _load_entry(path, loader=None):
+    path = os.path.abspath(path)
+    stat_key = _stat_key(path)
+    entry = _models.get(path)
+    if entry is not None and entry.stat_key == stat_key:
+        return entry
+
+    with _lock:
+        entry = _models.get(path)
+        if entry is not None and entry.stat_key == stat_key:
+            return entry
+
+        if loader is None and entry is not None:
+            loader = entry.loader
+        digest = file_digest(path)
+        if entry is not None and entry.digest == digest:
+            # File was touched or copied over with identical content
+            entry.stat_key = stat_key
+            return entry
+
+        try:
+            model, load_seconds, memory_bytes = _deserialize(path, loader)
+        except Exception as exc:
+            if entry is None:
+                raise
+            # A new model is probably still being written, keep serving the old one
+            warnings.warn(f"Could not reload {path}, keeping the previous model: {exc}", RuntimeWarning)
+            return entry
+
+        entry = LoadedModel(model, path, stat_key, digest, load_seconds, memory_bytes, stat_key[1], loader)
+        _models[path] = entry
+        return entry
+
+
+# Return the model stored at path, unpickling it only when the file has changed.
+# loader(path) replaces pickle for files written by other libraries (joblib, keras).
+def load_model(path=DEFAULT_MODEL_PATH, loader=None):
+    return _load_entry(path, loader).model
+
+
+# The model and its content hash from the same load, so a hot swap in between
+# cannot pair one model with the other's version
+def load_model_version(path=DEFAULT_MODEL_PATH, loader=None):
+    entry = _load_entry(path, loader)
+    return entry.model, entry.digest
+
+
+# Content hash of the currently loaded model, changes whenever it is hot-swapped
+def model_version(path=DEFAULT_MODEL_PATH):
+    return _load_entry(path).digest
+
+
+# Load statistics for the model stored at path
+def model_info(path=DEFAULT_MODEL_PATH):
+    entry = _load_entry(path)
+    return {
+        'path': entry.path,
+        'sha256': entry.digest,
+        'load_seconds': entry.load_seconds,
+        'memory_bytes': entry.memory_bytes,
+        'file_bytes': entry.file_bytes,
+        'loaded_at': entry.loaded_at,
+    }
+
+
+# Drop cached models so the next call reloads them from disk
+def clear_cache():
+    with _lock:
+        _models.clear()
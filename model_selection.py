@@ -0,0 +1,105 @@
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from joblib import Memory
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from dataset_cache import TARGET_COLUMN, build_text
+from text_model import TextClassifier, load_dataset, make_classifier, make_vectorizer, normalize_text, save_artifact
+
+# Parameter grids searched for each classifier of make_classifier
+SEARCH_SPACES = {
+    'nb': {'classifier__alpha': [0.01, 0.1, 0.5, 1.0]},
+    'tree': {'classifier__max_depth': [None, 20, 50], 'classifier__min_samples_leaf': [1, 5]},
+    'knn': {'classifier__n_neighbors': [3, 5, 11]},
+}
+SCORING = ('accuracy', 'f1')
+
+RESULT_COLUMNS = ['classifier', 'params', 'mean_test_accuracy', 'std_test_accuracy', 'mean_test_f1', 'std_test_f1',
+                  'mean_fit_time', 'mean_score_time', 'rank_test_f1', 'search_seconds']
+
+
+# Vectorizer and classifier in one pipeline. With memory, the vectorizer fitted on
+# each training fold is cached on disk, so every parameter set of the classifier
+# reuses it instead of refitting the CountVectorizer.
+def make_pipeline(classifier, vectorizer='count', ngram_range=(1, 1), memory=None):
+    return Pipeline([('vectorizer', make_vectorizer(vectorizer, ngram_range=ngram_range)),
+                     ('classifier', make_classifier(classifier))], memory=memory)
+
+
+# Cross-validated grid search over every classifier. Returns one row per candidate
+# with its scores and timings, and the best fitted search of each classifier.
+def search(texts, labels, classifiers=('nb', 'tree'), folds=5, n_jobs=None, vectorizer='count',
+           ngram_range=(1, 1), cache_dir=None, random_state=0):
+    own_cache = cache_dir is None
+    cache_dir = tempfile.mkdtemp(prefix='model_selection_') if own_cache else cache_dir
+    memory = Memory(cache_dir, verbose=0)
+    # Split once so every classifier is scored on the same folds and can reuse
+    # the vectorizers cached for them
+    cv = list(StratifiedKFold(folds, shuffle=True, random_state=random_state).split(texts, labels))
+    results, searches = [], {}
+    try:
+        for name in classifiers:
+            grid = GridSearchCV(make_pipeline(name, vectorizer, ngram_range, memory), SEARCH_SPACES[name],
+                                scoring=list(SCORING), refit='f1', cv=cv, n_jobs=n_jobs)
+            start = time.perf_counter()
+            grid.fit(texts, labels)
+            elapsed = time.perf_counter() - start
+
+            frame = pd.DataFrame(grid.cv_results_)
+            frame['classifier'] = name
+            frame['params'] = frame['params'].astype(str)
+            frame['search_seconds'] = elapsed
+            results.append(frame[RESULT_COLUMNS])
+            searches[name] = grid
+    finally:
+        if own_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return pd.concat(results, ignore_index=True), searches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cross-validated hyperparameter search for the text classifiers.')
+    parser.add_argument('dataset', help='fake_job_postings.csv, or its Parquet cache from dataset_cache.py')
+    parser.add_argument('-c', '--classifiers', nargs='+', choices=list(SEARCH_SPACES), default=['nb', 'tree'],
+                        help='classifiers to search; knn is slow on large vocabularies')
+    parser.add_argument('-o', '--output', default='model_selection.csv', help='where to write one row per candidate')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('-j', '--n-jobs', type=int, default=None, help='parallel fits, -1 for one per core')
+    parser.add_argument('--vectorizer', choices=['count', 'hashing'], default='count')
+    parser.add_argument('--ngram-max', type=int, default=1, help='use word n-grams from 1 up to this length')
+    parser.add_argument('--cache-dir', default=None, help='keep the fitted vectorizers here between runs')
+    parser.add_argument('--random-state', type=int, default=0, help='seed of the fold shuffle')
+    parser.add_argument('--save', action='store_true', help='save the best candidate as a text model artifact')
+    args = parser.parse_args(argv)
+
+    frame = load_dataset(args.dataset)
+    texts = normalize_text(build_text(frame)).tolist()
+    labels = frame[TARGET_COLUMN].to_numpy()
+    results, searches = search(texts, labels, args.classifiers, args.folds, args.n_jobs, args.vectorizer,
+                               (1, args.ngram_max), args.cache_dir, args.random_state)
+    results.to_csv(args.output, index=False)
+
+    for name, grid in searches.items():
+        best = results.loc[(results['classifier'] == name) & (results['rank_test_f1'] == 1)].iloc[0]
+        print(f"{name}: f1 {best['mean_test_f1']:.4f}, accuracy {best['mean_test_accuracy']:.4f} with "
+              f"{grid.best_params_} ({best['search_seconds']:.1f}s)", file=sys.stderr)
+    if args.save:
+        name = max(searches, key=lambda name: searches[name].best_score_)
+        grid = searches[name]
+        best = grid.best_index_
+        metrics = {'cv_accuracy': float(grid.cv_results_['mean_test_accuracy'][best]),
+                   'cv_f1': float(grid.best_score_), 'train_rows': len(labels)}
+        classifier = TextClassifier(grid.best_estimator_.named_steps['vectorizer'],
+                                    grid.best_estimator_.named_steps['classifier'], name, metrics)
+        print(f"Saved {name} -> {save_artifact(classifier)}", file=sys.stderr)
+    print(f"Wrote {len(results)} candidates -> {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import pickle
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import TARGET_COLUMN, TEXT_COLUMNS, build_text
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD = re.compile(r'\w+')
+
+
+# crc32 of every run of shingle_size consecutive words; texts shorter than that
+# are a single shingle
+def shingles(text, shingle_size=DEFAULT_SHINGLE_SIZE):
+    words = WORD.findall(str(text).lower())
+    count = max(len(words) - shingle_size + 1, 1)
+    return np.fromiter((zlib.crc32(' '.join(words[start:start + shingle_size]).encode())
+                        for start in range(count)), dtype=np.uint64, count=count)
+
+
+# Near-duplicate index of postings: word shingles -> MinHash signature -> LSH bands.
+# Two texts share a band bucket with high probability when their shingle sets
+# overlap by more than about (1 / bands) ** (1 / rows); candidates from the buckets
+# are then checked against threshold with the signature similarity.
+#
+# Lookups are a handful of dict hits, inserts only append, so the index can be
+# grown one posting at a time while it is being queried.
+class NearDuplicateIndex:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, shingle_size=DEFAULT_SHINGLE_SIZE,
+                 threshold=DEFAULT_THRESHOLD, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        # (a * x + b) mod p for num_perm random (a, b) pairs; 32 bit inputs and
+        # multipliers keep the products inside uint64
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.labels = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def signature(self, text):
+        hashes = shingles(text, self.shingle_size)
+        permuted = ((self._a * hashes + self._b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def insert_signature(self, signature, label=None):
+        if self.size == len(self._signatures):
+            # Grow the signature matrix by doubling, like a list
+            grown = np.empty((max(2 * self.size, 1024), self.num_perm), dtype=np.uint32)
+            grown[:self.size] = self._signatures[:self.size]
+            self._signatures = grown
+        doc_id = self.size
+        self._signatures[doc_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets[key].append(doc_id)
+        self.labels.append(label)
+        self.size += 1
+        return doc_id
+
+    # Add a posting text, returns its id in the index
+    def insert(self, text, label=None):
+        return self.insert_signature(self.signature(text), label)
+
+    def insert_many(self, texts, labels=None):
+        labels = [None] * len(texts) if labels is None else list(labels)
+        return [self.insert(text, label) for text, label in zip(texts, labels)]
+
+    def query_signature(self, signature, threshold=None):
+        threshold = self.threshold if threshold is None else threshold
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        if not candidates:
+            return []
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures[ids] == signature).mean(axis=1)
+        keep = similarity >= threshold
+        order = np.argsort(-similarity[keep], kind='stable')
+        return [(int(doc_id), float(score)) for doc_id, score in zip(ids[keep][order], similarity[keep][order])]
+
+    # (id, estimated Jaccard similarity) of the indexed near-duplicates of text, most similar first
+    def query(self, text, threshold=None):
+        return self.query_signature(self.signature(text), threshold)
+
+    # Label of the most similar labeled near-duplicate, or None when text matches no labeled posting
+    def match_label(self, text, threshold=None):
+        for doc_id, _ in self.query(text, threshold):
+            if self.labels[doc_id] is not None:
+                return self.labels[doc_id]
+        return None
+
+    # Boolean mask keeping the first posting of every group of near-duplicates in
+    # texts. Postings already in the index count as seen; kept texts are added to it.
+    def dedupe(self, texts, threshold=None):
+        keep = np.zeros(len(texts), dtype=bool)
+        for position, text in enumerate(texts):
+            signature = self.signature(text)
+            if not self.query_signature(signature, threshold):
+                self.insert_signature(signature)
+                keep[position] = True
+        return keep
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_signatures'] = self._signatures[:self.size].copy()
+        state['_buckets'] = [dict(buckets) for buckets in self._buckets]
+        return state
+
+    def __setstate__(self, state):
+        state['_buckets'] = [defaultdict(list, buckets) for buckets in state['_buckets']]
+        self.__dict__.update(state)
+
+
+# Index the combined text of a labeled dataset, every posting tagged with its fraudulent flag
+def build_index(frame, **options):
+    index = NearDuplicateIndex(**options)
+    labels = frame[TARGET_COLUMN].tolist() if TARGET_COLUMN in frame else None
+    index.insert_many(build_text(frame).tolist(), labels)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drop near-duplicate postings from a csv before scoring.')
+    parser.add_argument('input', help='csv with the text columns of fake_job_postings.csv')
+    parser.add_argument('-o', '--output', default='deduped.csv', help='where to write the kept postings')
+    parser.add_argument('--reference', help='labeled csv (fake_job_postings.csv); adds its label to matching postings')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='estimated Jaccard similarity')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    frame = pd.read_csv(args.input)
+    texts = build_text(frame.reindex(columns=frame.columns.union(TEXT_COLUMNS, sort=False))).tolist()
+    if args.reference:
+        reference = build_index(pd.read_csv(args.reference, usecols=TEXT_COLUMNS + [TARGET_COLUMN]),
+                                threshold=args.threshold)
+        frame['known_label'] = [reference.match_label(text) for text in texts]
+
+    keep = NearDuplicateIndex(threshold=args.threshold).dedupe(texts)
+    frame[keep].to_csv(args.output, index=False)
+    print(f"Kept {int(keep.sum())} of {len(frame)} postings in {time.perf_counter() - start:.1f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    # Run through the importable module so saved indexes reference
+    # near_duplicates.NearDuplicateIndex rather than __main__.NearDuplicateIndex
+    from near_duplicates import main
+    main()
@@ -0,0 +1,117 @@
+import numpy as np
+
+# Inference-only versions of the classifiers, written by export_model.py as .npz
+# files of plain arrays. Loading one imports neither scikit-learn nor scipy, and
+# the predictors mirror the estimator attributes the rest of the code relies on
+# (classes_, n_features_in_, feature_names_in_, predict, predict_proba).
+
+
+class NumpyModel:
+    kind = None
+
+    def __init__(self, arrays):
+        self.classes_ = arrays['classes']
+        self.n_features_in_ = int(arrays['n_features'])
+        if 'feature_names' in arrays:
+            self.feature_names_in_ = arrays['feature_names'].astype(object)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+# DecisionTreeClassifier flattened into its node arrays. All rows walk the tree
+# together, one level per step, so a batch costs max_depth vectorized steps.
+class TreeModel(NumpyModel):
+    kind = 'tree'
+
+    def __init__(self, arrays):
+        super().__init__(arrays)
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.max_depth = int(arrays['max_depth'])
+        value = arrays['value'].astype(np.float64)
+        self.proba = value / np.maximum(value.sum(axis=1, keepdims=True), np.finfo(np.float64).tiny)
+
+    def apply(self, X):
+        # scikit-learn compares float32 features with the float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.intp)
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            internal = left != -1
+            if not internal.any():
+                break
+            goes_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(goes_left, left, self.children_right[node]), node)
+        return node
+
+    def predict_proba(self, X):
+        return self.proba[self.apply(X)]
+
+
+# MultinomialNB: the joint log likelihood is one matrix product with the
+# feature log probabilities
+class NaiveBayesModel(NumpyModel):
+    kind = 'nb'
+
+    def __init__(self, arrays):
+        super().__init__(arrays)
+        self.feature_log_prob = arrays['feature_log_prob']
+        self.class_log_prior = arrays['class_log_prior']
+
+    def joint_log_likelihood(self, X):
+        return np.asarray(X @ self.feature_log_prob.T) + self.class_log_prior
+
+    def predict(self, X):
+        return self.classes_[self.joint_log_likelihood(X).argmax(axis=1)]
+
+    def predict_log_proba(self, X):
+        jll = self.joint_log_likelihood(X)
+        top = jll.max(axis=1, keepdims=True)
+        return jll - (top + np.log(np.exp(jll - top).sum(axis=1, keepdims=True)))
+
+    def predict_proba(self, X):
+        return np.exp(self.predict_log_proba(X))
+
+
+# LogisticRegression: sigmoid of the decision function for two classes, softmax otherwise
+class LinearModel(NumpyModel):
+    kind = 'linear'
+
+    def __init__(self, arrays):
+        super().__init__(arrays)
+        self.coef = arrays['coef']
+        self.intercept = arrays['intercept']
+
+    def decision_function(self, X):
+        scores = np.asarray(X @ self.coef.T) + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(np.intp)]
+        return self.classes_[scores.argmax(axis=1)]
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            fake = 1 / (1 + np.exp(-scores))
+            return np.column_stack([1 - fake, fake])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+MODEL_TYPES = {model_type.kind: model_type for model_type in (TreeModel, NaiveBayesModel, LinearModel)}
+
+
+def load_numpy_model(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        arrays = {name: arrays[name] for name in arrays.files}
+    kind = str(arrays['kind'])
+    if kind not in MODEL_TYPES:
+        raise ValueError(f"{path} holds an unknown model kind {kind!r}")
+    return MODEL_TYPES[kind](arrays)
@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from model_loader import DEFAULT_MODEL_PATH, load_model
+from scoring import predict_block
+
+DEFAULT_SHARD_SIZE = 20000
+
+# Path of the model used by this worker process, set by the pool initializer
+_worker_model_path = None
+
+
+def _init_worker(model_path):
+    global _worker_model_path
+    _worker_model_path = model_path
+    # Unpickled once per worker, later shards reuse the cached estimator
+    load_model(model_path)
+
+
+def _score_shard(shard):
+    return predict_block(load_model(_worker_model_path), shard)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# Split rows into consecutive shards of at most shard_size rows
+def split_shards(X, shard_size=DEFAULT_SHARD_SIZE):
+    return [X[start:start + shard_size] for start in range(0, len(X), shard_size)]
+
+
+# Scores an encoded feature matrix in shards across a worker pool and returns
+# (predictions, fake_probability) in the original row order.
+#
+# backend='process' gives every worker its own interpreter and its own copy of
+# the model, loaded once in the pool initializer. backend='thread' shares the
+# process' cached model and only scales when the estimator releases the GIL.
+class ParallelScorer:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, workers=None, backend='process',
+                 shard_size=DEFAULT_SHARD_SIZE):
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"backend must be 'process' or 'thread', not {backend!r}")
+        self.model_path = model_path
+        self.workers = workers or default_workers()
+        self.backend = backend
+        self.shard_size = shard_size
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            if self.backend == 'process':
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.model_path,))
+            else:
+                load_model(self.model_path)
+                self._pool = ThreadPoolExecutor(self.workers, initializer=_init_worker,
+                                                initargs=(self.model_path,))
+        return self._pool
+
+    def score(self, X):
+        if len(X) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if self.workers == 1:
+            return predict_block(load_model(self.model_path), X)
+
+        shards = split_shards(X, self.shard_size)
+        # map hands results back in submission order, so shards merge in place
+        results = list(self._executor().map(_score_shard, shards))
+        predictions = np.concatenate([result[0] for result in results])
+        fake_probability = np.concatenate([result[1] for result in results])
+        return predictions, fake_probability
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def score_parallel(X, model_path=DEFAULT_MODEL_PATH, workers=None, backend='process',
+                   shard_size=DEFAULT_SHARD_SIZE):
+    with ParallelScorer(model_path, workers, backend, shard_size) as scorer:
+        return scorer.score(X)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from model_loader import DEFAULT_MODEL_PATH, load_model_version
+from scoring import predict_block
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+# Bounded LRU cache of predictions keyed on the encoded feature row.
+# The inputs are a handful of flags and selects, so the same rows come back over
+# and over; cached rows never reach the estimator. Entries are dropped as soon as
+# the model file's content hash changes.
+class PredictionCache:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, maxsize=DEFAULT_CACHE_SIZE):
+        self.model_path = model_path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    # One-hot rows packed to bits: 73 features fit in a 10 byte key
+    @staticmethod
+    def row_keys(X):
+        packed = np.packbits(np.asarray(X) != 0, axis=1)
+        return [row.tobytes() for row in packed]
+
+    # Same result as scoring.predict_block, only missing rows are scored
+    def predict(self, X):
+        model, version = load_model_version(self.model_path)
+        keys = self.row_keys(X)
+        predictions = [None] * len(keys)
+        fake_probability = np.empty(len(keys))
+        missing = {}
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    predictions[i], fake_probability[i] = entry
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += sum(len(rows) for rows in missing.values())
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            scored, probability = predict_block(model, np.asarray(X)[first_rows])
+            with self._lock:
+                for (key, rows), prediction, fake in zip(missing.items(), scored, probability):
+                    for i in rows:
+                        predictions[i], fake_probability[i] = prediction, fake
+                    if self._version == version:
+                        self._entries[key] = (prediction, fake)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return np.asarray(predictions), fake_probability
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+# Cache shared by everything in the process that scores with the same model file
+@lru_cache(maxsize=None)
+def shared_cache(model_path=DEFAULT_MODEL_PATH, maxsize=DEFAULT_CACHE_SIZE):
+    return PredictionCache(model_path, maxsize)
@@ -0,0 +1,160 @@
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import BINARY_FIELDS, CATEGORICAL_FIELDS, FIELDS, default_encoder
+from ingest import DEFAULT_CHUNKSIZE, ID_COLUMN, read_postings
+
+# The answer-count heuristic of the Classifier pages: every answer that leaves a
+# posting vague counts once, and two or more make it look fake
+DEFAULT_RULES = (
+    {'name': 'no_remote_work', 'field': 'telecommuting', 'values': ['No'],
+     'description': 'Remote work not offered'},
+    {'name': 'no_company_logo', 'field': 'has_company_logo', 'values': ['No'],
+     'description': 'No company logo'},
+    {'name': 'no_questions', 'field': 'has_questions', 'values': ['No'],
+     'description': 'No screening questions'},
+    {'name': 'employment_type_unspecified', 'field': 'employment_type', 'values': ['Not Specified'],
+     'description': 'Employment type not specified'},
+    {'name': 'experience_not_applicable', 'field': 'required_experience', 'values': ['Not Applicable'],
+     'description': 'Required experience not applicable'},
+    {'name': 'education_unspecified', 'field': 'required_education', 'values': ['Unspecified'],
+     'description': 'Required education unspecified'},
+    {'name': 'industry_unspecified', 'field': 'industry', 'values': ['Not Specified'],
+     'description': 'Industry not specified'},
+    {'name': 'function_unspecified', 'field': 'function', 'values': ['Not Specified'],
+     'description': 'Job function not specified'},
+)
+DEFAULT_THRESHOLD = 2
+
+# Answers of the binary fields as the apps offer them
+_BINARY_OPTIONS = ('No', 'Yes')
+
+
+def _options(field):
+    return _BINARY_OPTIONS if field in BINARY_FIELDS else CATEGORICAL_FIELDS[field]
+
+
+# Rules compiled against the category codes of feature_encoder: each rule becomes
+# a boolean lookup table over one field's codes, so evaluating it for a whole
+# column of postings is a single fancy-indexing gather. A posting is flagged as
+# fake when the weights of the rules it fires add up to at least threshold.
+class RuleSet:
+    def __init__(self, rules=DEFAULT_RULES, threshold=DEFAULT_THRESHOLD):
+        self.rules = [dict(rule) for rule in rules]
+        self.threshold = threshold
+        self.names = [rule['name'] for rule in self.rules]
+        self.weights = np.array([rule.get('weight', 1) for rule in self.rules], dtype=np.float64)
+        self._columns = np.empty(len(self.rules), dtype=np.intp)
+        self._tables = []
+        for i, rule in enumerate(self.rules):
+            field = rule['field']
+            if field not in FIELDS:
+                raise ValueError(f"Rule {rule['name']!r} uses unknown field {field!r}")
+            options = _options(field)
+            unknown = [value for value in rule['values'] if value not in options]
+            if unknown:
+                raise ValueError(f"Rule {rule['name']!r} matches unknown {field} values {unknown}")
+            table = np.zeros(len(options), dtype=bool)
+            table[[options.index(value) for value in rule['values']]] = True
+            self._columns[i] = FIELDS.index(field)
+            self._tables.append(table)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec['rules'], spec.get('threshold', DEFAULT_THRESHOLD))
+
+    # (n, n_rules) boolean matrix of the rules each row of category codes fires
+    def fired(self, codes):
+        codes = np.asarray(codes)
+        fired = np.empty((len(codes), len(self.rules)), dtype=bool)
+        for i, (column, table) in enumerate(zip(self._columns, self._tables)):
+            fired[:, i] = table[codes[:, column]]
+        return fired
+
+    # (predictions, scores, fired) for an (n, 8) array of category codes; 1 is fake
+    def predict_codes(self, codes):
+        fired = self.fired(codes)
+        scores = fired @ self.weights
+        return (scores >= self.threshold).astype(np.int64), scores, fired
+
+    # Same for a dict, a list of dicts or a DataFrame of postings
+    def predict(self, postings):
+        return self.predict_codes(default_encoder().codes(postings))
+
+    # Names of the rules fired by one row of the fired matrix
+    def fired_names(self, fired_row):
+        return [name for name, hit in zip(self.names, fired_row) if hit]
+
+    def fired_descriptions(self, fired_row):
+        return [rule.get('description', rule['name']) for rule, hit in zip(self.rules, fired_row) if hit]
+
+    # Whether a single posting looks fake, and the descriptions of the rules it fired
+    def check(self, posting):
+        predictions, _, fired = self.predict(posting)
+        return bool(predictions[0]), self.fired_descriptions(fired[0])
+
+    # How often each rule fired over a fired matrix
+    def report(self, fired):
+        return dict(zip(self.names, np.asarray(fired).sum(axis=0).tolist()))
+
+
+# The default rules, compiled once per process
+@lru_cache(maxsize=None)
+def default_rules():
+    return RuleSet()
+
+
+# Flag every posting of a csv chunk by chunk. Returns the posting count, the
+# number flagged and how often each rule fired.
+def score_csv(rule_set, input_path, output_path, chunksize=DEFAULT_CHUNKSIZE):
+    encoder = default_encoder()
+    rows = flagged = 0
+    counts = np.zeros(len(rule_set.rules), dtype=np.int64)
+    with open(output_path, 'w', newline='') as out:
+        for chunk in read_postings(input_path, chunksize):
+            predictions, scores, fired = rule_set.predict_codes(encoder.codes(chunk))
+            names = np.array(rule_set.names, dtype=object)
+            scored = pd.DataFrame({
+                ID_COLUMN: chunk[ID_COLUMN].to_numpy(),
+                'prediction': predictions,
+                'rule_score': scores,
+                'fired': [';'.join(names[row]) for row in fired],
+            })
+            scored.to_csv(out, header=rows == 0, index=False)
+            rows += len(scored)
+            flagged += int(predictions.sum())
+            counts += fired.sum(axis=0)
+    return rows, flagged, dict(zip(rule_set.names, counts.tolist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flag postings with the rule based pre-filter.')
+    parser.add_argument('input', help='csv with the fake_job_postings.csv columns')
+    parser.add_argument('-o', '--output', default='rule_flags.csv', help='where to write the flags')
+    parser.add_argument('--rules', help='json file with "rules" and "threshold", the default rules otherwise')
+    parser.add_argument('--threshold', type=float, default=None, help='override the threshold of the rules')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    rule_set = RuleSet.from_json(args.rules) if args.rules else RuleSet()
+    if args.threshold is not None:
+        rule_set.threshold = args.threshold
+    start = time.perf_counter()
+    rows, flagged, counts = score_csv(rule_set, args.input, args.output, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(f"Flagged {flagged} of {rows} postings in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s "
+          f"-> {args.output}", file=sys.stderr)
+    for name, count in counts.items():
+        print(f"  {name}: {count}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import numpy as np
+
+# Class labels used by the model: 0 is a real posting, 1 a fake one
+LABELS = {0: 'Real', 1: 'Fake'}
+
+
+# Predicted class and probability of being fake for a block of encoded rows.
+# The estimator is called once per block; predict is the argmax of predict_proba
+# for the classifiers used here, so both come out of a single call.
+def predict_block(model, X):
+    if not hasattr(model, 'predict_proba'):
+        predictions = np.asarray(model.predict(X))
+        return predictions, predictions.astype(np.float64)
+
+    proba = np.asarray(model.predict_proba(X))
+    classes = np.asarray(model.classes_)
+    predictions = classes[proba.argmax(axis=1)]
+    fake_column = np.flatnonzero(classes == 1)
+    if len(fake_column):
+        fake_probability = proba[:, fake_column[0]]
+    else:
+        fake_probability = np.zeros(len(proba))
+    return predictions, fake_probability
+
+
+# Human readable label for each prediction
+def label_names(predictions):
+    return [LABELS.get(int(prediction), str(prediction)) for prediction in predictions]
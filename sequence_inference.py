@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import ID_COLUMN
+from model_loader import load_model
+from scoring import label_names
+from text_preprocess import preprocess_corpus
+
+# Settings the deep learning notebook trained model1 (BiLSTM) and model2 (GRU) with
+VOC_SIZE = 5000
+SENT_LENGTH = 40
+THRESHOLD = 0.5
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_CHUNKSIZE = 50000
+
+# Default filters of keras.preprocessing.text.text_to_word_sequence
+KERAS_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+_FILTER_TABLE = str.maketrans(KERAS_FILTERS, ' ' * len(KERAS_FILTERS))
+
+OUTPUT_COLUMNS = [ID_COLUMN, 'prediction', 'label', 'fake_probability']
+
+
+HASH_FUNCTIONS = ('builtin', 'md5')
+
+
+def _md5_hash(word):
+    return int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16)
+
+
+# keras one_hot(text, n): lowercase, filters turned into spaces, every word hashed
+# into 1..n-1. 'builtin' is keras' default hash(), which is salted per process for
+# str, so the indices only match training when PYTHONHASHSEED matches too. 'md5'
+# is keras hashing_trick(hash_function='md5'), the same in every process, but a
+# model has to be trained with it.
+def one_hot(text, n=VOC_SIZE, hash_function='builtin'):
+    words = text.lower().translate(_FILTER_TABLE).split(' ')
+    hasher = _md5_hash if hash_function == 'md5' else hash
+    return [hasher(word) % (n - 1) + 1 for word in words if word]
+
+
+# The builtin hash only reproduces the training indices with a fixed seed; with
+# the default random seed every run would score meaningless indices
+def check_hash_seed():
+    seed = os.environ.get('PYTHONHASHSEED', 'random')
+    if sys.flags.hash_randomization and not seed.isdigit():
+        raise RuntimeError('one_hot with the builtin hash needs PYTHONHASHSEED set to the seed the model was '
+                           "trained with, or a model trained with hash_function='md5'")
+
+
+# pad_sequences(sequences, maxlen=width, padding='pre', truncating='pre') written
+# into a preallocated int32 buffer. Rows past the last sequence are left as zeros.
+def pad_into(sequences, out):
+    out.fill(0)
+    width = out.shape[1]
+    for row, sequence in enumerate(sequences):
+        sequence = sequence[-width:]
+        if sequence:
+            out[row, width - len(sequence):] = sequence
+    return out
+
+
+# joblib.dump is how the notebook saves the models; .h5 and .keras files are
+# loaded with keras itself. tensorflow is only imported when a model is loaded.
+def _load_keras_model(path):
+    if path.endswith(('.h5', '.keras')):
+        from tensorflow import keras
+        return keras.models.load_model(path, compile=False)
+    import joblib
+    return joblib.load(path)
+
+
+# Scores raw texts with one of the notebook's sequence models on the CPU.
+# Texts go through the notebook's preprocessing and one_hot hashing, and are padded
+# into reused int32 buffers of batch_size rows. Every model call gets a full buffer,
+# so the input shape never changes and the traced predict function is reused.
+#
+# With buckets, e.g. (10, 20, 40), short texts are batched together at a smaller
+# width instead of being padded to SENT_LENGTH. That only saves time for models
+# that accept variable length input, and changes the scores slightly since the
+# models were trained on zero padded sequences without masking.
+#
+# The buffers are shared, so one runner must not be used from several threads at once.
+class SequenceModelRunner:
+    def __init__(self, model_path, batch_size=DEFAULT_BATCH_SIZE, buckets=None, voc_size=VOC_SIZE,
+                 maxlen=SENT_LENGTH, preprocess=True, workers=1, hash_function='builtin'):
+        if hash_function not in HASH_FUNCTIONS:
+            raise ValueError(f"Unknown hash function {hash_function!r}, expected one of {HASH_FUNCTIONS}")
+        if hash_function == 'builtin':
+            check_hash_seed()
+        self.hash_function = hash_function
+        self.model = load_model(model_path, loader=_load_keras_model)
+        self.batch_size = batch_size
+        self.voc_size = voc_size
+        self.maxlen = maxlen
+        self.preprocess = preprocess
+        self.workers = workers
+        self.buckets = sorted({min(width, maxlen) for width in buckets or ()} | {maxlen})
+        self._buffers = {width: np.zeros((batch_size, width), dtype=np.int32) for width in self.buckets}
+
+    def sequences(self, texts):
+        texts = ['' if text is None or text != text else str(text) for text in texts]
+        if self.preprocess:
+            texts = preprocess_corpus(texts, self.workers)
+        return [one_hot(text, self.voc_size, self.hash_function) for text in texts]
+
+    def _predict_batch(self, sequences, width):
+        buffer = pad_into(sequences, self._buffers[width])
+        scores = np.asarray(self.model.predict_on_batch(buffer), dtype=np.float32)
+        return scores.reshape(-1)[:len(sequences)]
+
+    # Probability of being fake for every text, in input order
+    def predict_proba(self, texts):
+        sequences = self.sequences(texts)
+        scores = np.empty(len(sequences), dtype=np.float32)
+        lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+        # Smallest bucket that fits each text, longer texts are truncated to the last bucket
+        bucket_of = np.minimum(np.searchsorted(self.buckets, lengths), len(self.buckets) - 1)
+        for index, width in enumerate(self.buckets):
+            rows = np.flatnonzero(bucket_of == index)
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                scores[batch] = self._predict_batch([sequences[row] for row in batch], width)
+        return scores
+
+    # 1 for fake, with the notebook's 0.5 threshold
+    def predict(self, texts):
+        return (self.predict_proba(texts) >= THRESHOLD).astype(np.int64)
+
+
+# Score the text column of a csv chunk by chunk and write the predictions to output
+def score_csv(runner, input_path, output_path, column='description', chunksize=DEFAULT_CHUNKSIZE):
+    rows = fakes = 0
+    with open(output_path, 'w', newline='') as out:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            fake_probability = runner.predict_proba(chunk[column].tolist())
+            predictions = (fake_probability >= THRESHOLD).astype(np.int64)
+            ids = chunk[ID_COLUMN].to_numpy() if ID_COLUMN in chunk else np.arange(rows, rows + len(chunk))
+            scored = pd.DataFrame({
+                ID_COLUMN: ids,
+                'prediction': predictions,
+                'label': label_names(predictions),
+                'fake_probability': fake_probability,
+            })
+            scored.to_csv(out, header=rows == 0, index=False, columns=OUTPUT_COLUMNS)
+            rows += len(scored)
+            fakes += int(predictions.sum())
+    return rows, fakes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score postings with a BiLSTM / GRU model of the deep learning notebook.')
+    parser.add_argument('model', help='model saved with joblib.dump, or a .h5 / .keras file')
+    parser.add_argument('input', help='csv with the text column')
+    parser.add_argument('-c', '--column', default='description', help='text column the model was trained on')
+    parser.add_argument('-o', '--output', default='sequence_predictions.csv', help='where to write the predictions')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='sequences per model call')
+    parser.add_argument('--buckets', default=None,
+                        help='comma separated sequence lengths to batch short texts at, e.g. 10,20,40')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='csv rows read at a time')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='preprocessing processes, 0 for one per core')
+    parser.add_argument('--hash', choices=HASH_FUNCTIONS, default='builtin',
+                        help="word hash the model was trained with; 'builtin' needs PYTHONHASHSEED")
+    parser.add_argument('--no-preprocess', action='store_true', help='the column is already preprocessed')
+    args = parser.parse_args(argv)
+
+    buckets = [int(width) for width in args.buckets.split(',')] if args.buckets else None
+    start = time.perf_counter()
+    runner = SequenceModelRunner(args.model, args.batch_size, buckets, preprocess=not args.no_preprocess,
+                                 workers=args.workers or None, hash_function=args.hash)
+    rows, fakes = score_csv(runner, args.input, args.output, args.column, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} postings ({fakes} fake) in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from compiled_model import CompiledModel, load_or_compile
+from feature_encoder import FIELDS, FeatureEncoder
+from micro_batch import DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS, BackgroundBatcher
+from model_loader import DEFAULT_MODEL_PATH, load_model, model_version
+from prediction_cache import DEFAULT_CACHE_SIZE, PredictionCache
+from scoring import label_names, predict_block
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Field values the encoder can look up; unknown categories fall back like in the app
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+# Raised for requests the service cannot score, reported back as HTTP 400
+class BadRequest(Exception):
+    pass
+
+
+# Scores postings with the cached model and the shared encoder. With max_batch
+# set, single postings from concurrent requests are coalesced into one model call;
+# with cache_size set, repeated postings are answered from an LRU cache. A compiled
+# lookup table replaces the estimator (and the cache) entirely.
+class PredictionService:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, max_batch=0, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 cache_size=0, compiled=None):
+        self.model_path = model_path
+        self.compiled = compiled
+        if compiled is None:
+            load_model(model_path)
+        self.cache = PredictionCache(model_path, cache_size) if cache_size > 0 and compiled is None else None
+        self.batcher = BackgroundBatcher(self.predict, max_batch, max_wait_ms) if max_batch > 1 else None
+
+    def predict_one(self, posting):
+        if self.batcher is None:
+            return self.predict([posting])[0]
+        return self.batcher.submit(posting)
+
+    def predict(self, postings):
+        if self.compiled is not None:
+            predictions, fake_probability = self.compiled.predict_postings(postings)
+        else:
+            model = load_model(self.model_path)
+            X = FeatureEncoder.for_model(model).encode(postings)
+            if self.cache is None:
+                predictions, fake_probability = predict_block(model, X)
+            else:
+                predictions, fake_probability = self.cache.predict(X)
+        return [
+            {'prediction': int(prediction), 'label': label, 'fake_probability': float(probability)}
+            for prediction, label, probability in zip(predictions, label_names(predictions), fake_probability)
+        ]
+
+    def health(self):
+        if self.compiled is not None:
+            health = {'status': 'ok', 'model': self.compiled.path, 'model_sha256': self.compiled.model_sha256}
+        else:
+            health = {'status': 'ok', 'model': self.model_path, 'model_sha256': model_version(self.model_path)}
+        if self.batcher is not None:
+            health['batching'] = self.batcher.stats()
+        if self.cache is not None:
+            health['cache'] = self.cache.stats()
+        return health
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+# Accepts a single posting, a list of postings or {"postings": [...]}
+def parse_postings(payload):
+    if isinstance(payload, dict) and 'postings' in payload:
+        postings, single = payload['postings'], False
+    elif isinstance(payload, dict):
+        postings, single = [payload], True
+    else:
+        postings, single = payload, False
+    if not isinstance(postings, list) or not all(isinstance(posting, dict) for posting in postings):
+        raise BadRequest('Expected a posting object or an array of posting objects')
+    for posting in postings:
+        unknown = set(posting) - set(FIELDS)
+        if unknown:
+            raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+        invalid = [field for field, value in posting.items() if not isinstance(value, SCALAR_TYPES)]
+        if invalid:
+            raise BadRequest(f"Fields must be strings, numbers or null: {', '.join(sorted(invalid))}")
+    return postings, single
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = 'HTTP/1.1'
+    server_version = 'JobPostingClassifier/1.0'
+    service = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {'error': 'Request body too large'})
+            return
+        body = self.rfile.read(length)
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        # Only a malformed request is the client's fault; anything the service raises is a 500
+        try:
+            postings, single = parse_postings(json.loads(body or b'null'))
+        except (BadRequest, ValueError) as exc:
+            self._send_json(400, {'error': str(exc)})
+            return
+        try:
+            if single:
+                result = self.service.predict_one(postings[0])
+            else:
+                result = {'predictions': self.service.predict(postings) if postings else []}
+        except Exception as exc:
+            # Answer instead of dropping the connection, and keep the details in the log
+            self.log_error('Prediction failed: %r', exc)
+            self._send_json(500, {'error': 'Internal error'})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # Errors are logged even when requests are not
+    def log_error(self, format, *args):
+        super().log_message(format, *args)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for many clients connecting at once, the default backlog is 5
+    request_queue_size = 128
+
+
+def make_server(host='127.0.0.1', port=8000, service=None, verbose=False):
+    handler = type('Handler', (PredictionHandler,), {'service': service or PredictionService()})
+    server = PredictionServer((host, port), handler)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve job posting predictions over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-m', '--model', default=DEFAULT_MODEL_PATH, help='pickled classifier')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help='coalesce up to this many concurrent single postings per model call, 0 to disable')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help='longest a posting waits for its batch to fill')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='predictions kept in the LRU cache, 0 to disable')
+    parser.add_argument('--compiled', metavar='TABLE',
+                        help='serve from a lookup table built by compiled_model.py, rebuilt when the model changes')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    compiled = None
+    if args.compiled:
+        compiled = load_or_compile(args.model, args.compiled) if os.path.exists(args.model) else CompiledModel(args.compiled)
+    service = PredictionService(args.model, args.max_batch, args.max_wait_ms, args.cache_size, compiled)
+    server = make_server(args.host, args.port, service, args.verbose)
+    print(f"Serving predictions on http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
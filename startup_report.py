@@ -0,0 +1,107 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_TARGETS = ['app.py', 'test4wel.py', 'test.py', 'b1.py', 'b2.py']
+
+# Runs a page script like the first Streamlit rerun of a fresh container would.
+# The run name keeps the command line tools from starting their main().
+_RUNNER = "import runpy, sys; runpy.run_path(sys.argv[1], run_name='__startup_report__')"
+
+
+# (self_us, cumulative_us, depth, module) for every line of -X importtime output
+def parse_importtime(stderr):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        imports.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return imports
+
+
+# Import the module or run the script in a fresh interpreter under -X importtime.
+# Returns the wall time of the whole process and the parsed imports.
+def measure(target):
+    if target.endswith('.py'):
+        command = [sys.executable, '-X', 'importtime', '-c', _RUNNER, target]
+    else:
+        command = [sys.executable, '-X', 'importtime', '-c', f'import {target}']
+    # Streamlit scripts run in bare mode here and only log warnings. The repository
+    # goes on the path so its modules can be imported from any working directory.
+    env = dict(os.environ, PYTHONWARNINGS='ignore')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                      env.get('PYTHONPATH')]))
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"{target} failed to start:\n" + '\n'.join(errors[-20:]))
+    return elapsed, parse_importtime(result.stderr)
+
+
+# Imports made by the script itself, or by the imported module. importtime lists
+# a module after everything it imported, so a module's own imports are the lines
+# one level deeper right before it.
+def direct_imports(imports, target):
+    if target.endswith('.py'):
+        return [item for item in imports if item[2] == 0]
+    for index, (_, _, depth, name) in enumerate(imports):
+        if depth == 0 and name == target:
+            break
+    else:
+        return []
+    children = []
+    for item in reversed(imports[:index]):
+        if item[2] == 0:
+            break
+        if item[2] == 1:
+            children.append(item)
+    return children
+
+
+# Self time of every top level package, with its submodules folded in
+def package_times(imports):
+    totals = defaultdict(int)
+    for self_us, _, _, name in imports:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def report(target, top=15):
+    elapsed, imports = measure(target)
+    import_us = sum(self_us for self_us, _, _, _ in imports)
+    lines = [f"{target}: {elapsed * 1000:.0f} ms to start, {import_us / 1000:.0f} ms in {len(imports)} imports"]
+    lines.append('  packages by self time:')
+    lines += [f"    {us / 1000:8.1f} ms  {name}" for name, us in package_times(imports)[:top]]
+    lines.append('  direct imports by cumulative time:')
+    direct = sorted(direct_imports(imports, target), key=lambda item: -item[1])
+    lines += [f"    {cumulative / 1000:8.1f} ms  {name}" for _, cumulative, _, name in direct[:top]]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Break down where the app entry points spend their start up time.')
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS,
+                        help='page scripts (.py) to run or module names to import')
+    parser.add_argument('--top', type=int, default=15, help='rows to show per table')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for target in args.targets:
+        try:
+            print(report(target, args.top))
+        except RuntimeError as exc:
+            print(exc, file=sys.stderr)
+            failed = True
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from model_loader import file_digest
+
+DEFAULT_DB_PATH = 'job_postings.db'
+USERS_CSV = 'user_data.csv'
+FEEDBACK_CSV = 'job_posting_feedback.csv'
+
+# Header rows written by the apps before the store existed
+LEGACY_HEADERS = {
+    'users': ['Username', 'Email', 'Password'],
+    'feedback': ['Company Name', 'Reference Link', 'Is Real Posting'],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT,
+    password TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    reference_link TEXT,
+    is_real_posting TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_company_name ON feedback (company_name);
+
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    imported_at REAL NOT NULL,
+    PRIMARY KEY (path, sha256)
+);
+"""
+
+
+# SQLite store for registrations and posting feedback.
+# WAL mode lets the Streamlit sessions read while one of them writes, and every
+# thread gets its own connection so concurrent reruns never share a cursor.
+class Store:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add_user(self, username, email, password):
+        self.add_users([(username, email, password)])
+
+    # Insert many (username, email, password) rows in one transaction
+    def add_users(self, rows):
+        with self._connect() as conn:
+            self._insert_users(conn, rows)
+
+    @staticmethod
+    def _insert_users(conn, rows):
+        now = time.time()
+        conn.executemany('INSERT INTO users (username, email, password, created_at) VALUES (?, ?, ?, ?)',
+                         [(username, email, password, now) for username, email, password in rows])
+
+    def find_user(self, username):
+        row = self._connect().execute(
+            'SELECT username, email, password, created_at FROM users WHERE username = ? ORDER BY id LIMIT 1',
+            (username,)).fetchone()
+        return dict(row) if row else None
+
+    def add_feedback(self, company_name, reference_link, is_real_posting):
+        self.add_feedbacks([(company_name, reference_link, is_real_posting)])
+
+    # Insert many (company_name, reference_link, is_real_posting) rows in one transaction
+    def add_feedbacks(self, rows):
+        with self._connect() as conn:
+            self._insert_feedback(conn, rows)
+
+    @staticmethod
+    def _insert_feedback(conn, rows):
+        now = time.time()
+        conn.executemany(
+            'INSERT INTO feedback (company_name, reference_link, is_real_posting, created_at) VALUES (?, ?, ?, ?)',
+            [(company, link, is_real, now) for company, link, is_real in rows])
+
+    def feedback_for_company(self, company_name):
+        rows = self._connect().execute(
+            'SELECT id, company_name, reference_link, is_real_posting, created_at FROM feedback '
+            'WHERE company_name = ? ORDER BY id', (company_name,)).fetchall()
+        return [dict(row) for row in rows]
+
+    # Feedback rows added after the row id watermark, oldest first
+    def feedback_since(self, watermark=0, limit=None):
+        rows = self._connect().execute(
+            'SELECT id, company_name, reference_link, is_real_posting, created_at FROM feedback '
+            'WHERE id > ? ORDER BY id LIMIT ?', (watermark, -1 if limit is None else limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    # Copy the rows of a legacy csv file into the store. Every import records how
+    # many rows it took, so when the file has grown only the rows appended since
+    # are imported and no row is ever copied twice. The check, the offset and the
+    # inserts share one write transaction, so processes starting at the same time
+    # import a file once between them.
+    def import_csv(self, path, table):
+        if not os.path.exists(path):
+            return 0
+        path, digest = os.path.abspath(path), file_digest(path)
+        conn = self._connect()
+        already = 'SELECT 1 FROM imports WHERE path = ? AND sha256 = ?'
+        if conn.execute(already, (path, digest)).fetchone():
+            return 0
+
+        with open(path, newline='') as f:
+            rows = [tuple(row[:3]) for row in csv.reader(f) if len(row) >= 3 and row[0]]
+        if rows and list(rows[0]) == LEGACY_HEADERS[table]:
+            rows = rows[1:]
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute(already, (path, digest)).fetchone():
+                return 0
+            imported = conn.execute('SELECT COALESCE(SUM(rows), 0) FROM imports WHERE path = ?',
+                                    (path,)).fetchone()[0]
+            rows = rows[imported:]
+            if table == 'users':
+                self._insert_users(conn, rows)
+            else:
+                self._insert_feedback(conn, rows)
+            conn.execute('INSERT INTO imports (path, sha256, rows, imported_at) VALUES (?, ?, ?, ?)',
+                         (path, digest, len(rows), time.time()))
+        return len(rows)
+
+    def import_legacy_files(self, users_csv=USERS_CSV, feedback_csv=FEEDBACK_CSV):
+        return self.import_csv(users_csv, 'users'), self.import_csv(feedback_csv, 'feedback')
+
+
+_store_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _open_store(path):
+    store = Store(path)
+    store.import_legacy_files()
+    return store
+
+
+# Store shared by every session of the process; the legacy csv files are
+# imported the first time it is opened. The lock keeps sessions that start at
+# the same time from each opening and importing their own.
+def get_store(path=DEFAULT_DB_PATH):
+    with _store_lock:
+        return _open_store(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import the legacy csv files into the SQLite store.')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database file')
+    parser.add_argument('--users', default=USERS_CSV, help='registrations csv')
+    parser.add_argument('--feedback', default=FEEDBACK_CSV, help='feedback csv')
+    args = parser.parse_args(argv)
+
+    users, feedback = Store(args.db).import_legacy_files(args.users, args.feedback)
+    print(f"Imported {users} users and {feedback} feedback rows into {args.db}")
+
+
+if __name__ == '__main__':
+    main()
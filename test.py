@@ -1,14 +1,4 @@
-import numpy as np
-import pickle
-import pandas as pd
 import streamlit as st
-from PIL import Image
-import requests
-from io import BytesIO
-import os
-
-# Loading up the Classification model we created
-model = pickle.load(open('job_posting.pkl', 'rb'))
 
 # Create a SessionState class to store the image and user inputs
 class SessionState:
@@ -29,13 +19,8 @@ def login(username, password):
 # Feedback function to store feedback in CSV
 def store_feedback(company_name, reference_link, is_real_posting):
     if company_name and reference_link and is_real_posting:
-        feedback_data = {
-            'Company Name': company_name,
-            'Reference Link': reference_link,
-            'Is Real Posting': is_real_posting
-        }
-        feedback_df = pd.DataFrame(feedback_data, index=[0])
-        feedback_df.to_csv('job_posting_feedback.csv', mode='a', header=not os.path.exists('job_posting_feedback.csv'), index=False)
+        from storage import get_store
+        get_store().add_feedback(company_name, reference_link, is_real_posting)
         st.success("Thanks for your feedback! We continue to improve our model.")
     else:
         st.error("Please fill in all the fields.")
@@ -72,6 +57,8 @@ if app_mode == 'Feedback':
 
 # Classifier page
 if app_mode == 'Classifier':
+    from feature_encoder import EMPLOYMENT_TYPES, REQUIRED_EXPERIENCE, REQUIRED_EDUCATION, INDUSTRIES, FUNCTIONS
+    from rules import default_rules
     st.title("Job Posting Classifier: Real/Fake")
     st.write("Enter a link to the job posting and answer the following questions to get the prediction.")
     user_input = st.text_input("Enter Job Posting Source Link")
@@ -79,12 +66,26 @@ if app_mode == 'Classifier':
     # Store the uploaded image in session state
     if user_input:
         if user_input.startswith(('http://', 'https://')):
-            response = requests.get(user_input)
-            if response.status_code == 200:
-                session_state.image = Image.open(BytesIO(response.content))
-                st.image(session_state.image, caption='Job Posting Image', use_column_width=True)
-            else:
+            # Only imported when a link is actually fetched
+            from fetcher import FetchError, shared_fetcher
+            from image_cache import shared_image_cache
+
+            # Pooled, cached fetch with hard timeouts, so a slow site cannot hang the session
+            try:
+                page = shared_fetcher().get(user_input)
+            except FetchError:
                 st.error("Error fetching image. Please check the URL.")
+            else:
+                if 'image' not in page.content_type:
+                    st.error("The link does not point to an image. Please provide a link to the job posting image.")
+                else:
+                    # A small encoded thumbnail, decoded once per image and shared by every session
+                    try:
+                        session_state.image = shared_image_cache().thumbnail(page.content)
+                    except OSError:
+                        st.error("The image could not be read. Please check the URL.")
+                    else:
+                        st.image(session_state.image, caption='Job Posting Image', use_column_width=True)
         else:
             st.error("Please provide a valid URL starting with http:// or https://")
     
@@ -104,54 +105,31 @@ if app_mode == 'Classifier':
         has_questions = st.radio('Does the job posting have questions?', options=['Yes', 'No'])
         
         # Question 4: What is the employment type?
-        employment_type = st.selectbox('What is the employment type?',
-                                       ('Not Specified', 'Other', 'Part-time', 'Contract', 'Temporary', 'Full-time'))
+        employment_type = st.selectbox('What is the employment type?', EMPLOYMENT_TYPES)
         
         # Question 5: What is the required experience?
-        required_experience = st.selectbox('What is the required experience?',
-                                           ('Not Applicable', 'Internship', 'Entry level', 'Mid-Senior level',
-                                            'Associate',  'Executive', 'Director'))
+        required_experience = st.selectbox('What is the required experience?', REQUIRED_EXPERIENCE)
         
         # Question 6: What is the required education?
-        required_education = st.selectbox('What is the required education?',
-                                          ('Unspecified', 'Vocational - HS Diploma', 'Some High School Coursework', 'High School or equivalent',
-                                           'Some College Coursework Completed', 'Certification', 'Vocational', 'Vocational - Degree', "Bachelor's Degree",
-                                           "Master's Degree", 'Associate Degree', 'Professional', 'Doctorate'))
+        required_education = st.selectbox('What is the required education?', REQUIRED_EDUCATION)
         
         # Question 7: Please choose which industry the job posting is relevant to
-        industry = st.selectbox('Please choose which industry the job posting is relevant to',
-                                ('Not Specified', 'Marketing and Advertising', 'Computer Software',
-                                 'Hospital & Health Care', 'Online Media',
-                                 'Information Technology and Services', 'Financial Services',
-                                 'Management Consulting', 'Internet',
-                                 'Telecommunications', 'Consumer Services', 'Construction',
-                                 'Oil & Energy', 'Education Management',
-                                 'Health, Wellness and Fitness', 'Insurance', 'E-Learning',
-                                 'Staffing and Recruiting', 'Human Resources', 'Real Estate',
-                                 'Automotive', 'Logistics and Supply Chain', 'Design', 'Accounting',
-                                 'Retail','Others'))
+        industry = st.selectbox('Please choose which industry the job posting is relevant to', INDUSTRIES)
         
         # Question 8: Please choose which umbrella term matches job's functionality?
-        function = st.selectbox('Please choose which umbrella term matches job\'s functionality?',
-                                ('Not Specified', 'Marketing', 'Customer Service', 'Sales',
-                                 'Health Care Provider', 'Management', 'Information Technology',
-                                 'Engineering', 'Administrative', 'Design', 'Production',
-                                 'Education', 'Business Development', 'Product Management',
-                                 'Consulting', 'Human Resources', 'Project Management', 'Finance',
-                                 'Accounting/Auditing', 'Art/Creative', 'Quality Assurance',
-                                 'Writing/Editing', 'Other'))
+        function = st.selectbox('Please choose which umbrella term matches job\'s functionality?', FUNCTIONS)
 
         if st.button('Get Your Prediction'):
-            # Count 'No' and 'Unspecified' answers
-            no_count = (telecommuting == 'No') + (has_company_logo == 'No') + (has_questions == 'No') + (employment_type == 'Not Specified') + \
-                       (required_experience == 'Not Applicable') + (required_education == 'Unspecified') + (industry == 'Not Specified') + \
-                       (function == 'Not Specified')
-            
-            # Set result based on the count
-            result = "Fake" if no_count >= 2 else "Real"
-            
-            # Display the result
+            posting = {'telecommuting': telecommuting, 'has_company_logo': has_company_logo,
+                       'has_questions': has_questions, 'employment_type': employment_type,
+                       'required_experience': required_experience, 'required_education': required_education,
+                       'industry': industry, 'function': function}
+            # Vague answers are counted by the rule engine, two or more flag the posting
+            is_fake, reasons = default_rules().check(posting)
+            result = "Fake" if is_fake else "Real"
             st.write(f"The given job posting is {result}")
+            if reasons:
+                st.write('Flags: ' + ', '.join(reasons))
 
 # Display login page until successful login
 if not getattr(session_state, 'logged_in', False) and app_mode != 'Login':
@@ -1,15 +1,4 @@
-import numpy as np
-import pickle
-import pandas as pd
 import streamlit as st
-from PIL import Image
-import requests
-from io import BytesIO
-import os
-import csv
-
-# Loading up the Classification model we created
-model = pickle.load(open('job_posting.pkl', 'rb'))
 
 # Create a SessionState class to store session-specific data
 class SessionState:
@@ -36,17 +25,9 @@ def register(username, email, password, retype_password):
         st.error("Passwords do not match.")
         return
     
-    # Store registration details in a CSV file
-    with open('user_data.csv', 'a', newline='') as csvfile:
-        fieldnames = ['Username', 'Email', 'Password']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        # Write header if file is empty
-        if os.stat('user_data.csv').st_size == 0:
-            writer.writeheader()
-
-        # Write registration data to CSV
-        writer.writerow({'Username': username, 'Email': email, 'Password': password})
+    # Store registration details
+    from storage import get_store
+    get_store().add_user(username, email, password)
 
     # Set registered status to True
     session_state.registered = True
@@ -55,13 +36,8 @@ def register(username, email, password, retype_password):
 # Function to handle feedback form submission
 def store_feedback(company_name, reference_link, is_real_posting):
     if company_name and reference_link and is_real_posting:
-        feedback_data = {
-            'Company Name': company_name,
-            'Reference Link': reference_link,
-            'Is Real Posting': is_real_posting
-        }
-        feedback_df = pd.DataFrame(feedback_data, index=[0])
-        feedback_df.to_csv('job_posting_feedback.csv', mode='a', header=not os.path.exists('job_posting_feedback.csv'), index=False)
+        from storage import get_store
+        get_store().add_feedback(company_name, reference_link, is_real_posting)
         st.success("Thanks for your feedback! We continue to improve our model.")
     else:
         st.error("Please fill in all the fields.")
@@ -134,6 +110,8 @@ if app_mode == 'Feedback':
 
 # Classifier page
 if app_mode == 'Classifier':
+    from feature_encoder import EMPLOYMENT_TYPES, REQUIRED_EXPERIENCE, REQUIRED_EDUCATION, INDUSTRIES, FUNCTIONS
+    from cascade import shared_cascade
     st.title("Job Posting Classifier: Real/Fake")
     st.write("Enter a link to the job posting and answer the following questions to get the prediction.")
 
@@ -141,13 +119,26 @@ if app_mode == 'Classifier':
 
     if user_input:
         if user_input.startswith(('http://', 'https://')):
-            response = requests.get(user_input)
-            if response.status_code == 200:
+            # Only imported when a link is actually fetched
+            from fetcher import FetchError, shared_fetcher
+            from image_cache import shared_image_cache
+
+            # Pooled, cached fetch with hard timeouts, so a slow site cannot hang the session
+            try:
+                page = shared_fetcher().get(user_input)
+            except FetchError:
+                page = None
+                st.error("Error fetching the link. Please check the URL.")
+            if page is not None:
                 # Check if response content is an image
-                content_type = response.headers['content-type']
-                if 'image' in content_type:
-                    session_state.image = Image.open(BytesIO(response.content))
-                    st.image(session_state.image, caption='Job Posting Image', use_column_width=True)
+                if 'image' in page.content_type:
+                    # A small encoded thumbnail, decoded once per image and shared by every session
+                    try:
+                        session_state.image = shared_image_cache().thumbnail(page.content)
+                    except OSError:
+                        st.error("The image could not be read. Please check the URL.")
+                    else:
+                        st.image(session_state.image, caption='Job Posting Image', use_column_width=True)
                 else:
                 # Display classifier questions directly
                  st.subheader('Enter the details:')
@@ -156,16 +147,23 @@ if app_mode == 'Classifier':
                 telecommuting = st.radio('Is work from home or remote work allowed?', options=['Yes', 'No'])
                 has_company_logo = st.radio('Does the job posting have a company logo?', options=['Yes', 'No'])
                 has_questions = st.radio('Does the job posting have questions?', options=['Yes', 'No'])
-                employment_type = st.selectbox('What is the employment type?', ('Not Specified', 'Other', 'Part-time', 'Contract', 'Temporary', 'Full-time'))
-                required_experience = st.selectbox('What is the required experience?', ('Not Applicable', 'Internship', 'Entry level', 'Mid-Senior level', 'Associate',  'Executive', 'Director'))
-                required_education = st.selectbox('What is the required education?', ('Unspecified', 'Vocational - HS Diploma', 'Some High School Coursework', 'High School or equivalent', 'Some College Coursework Completed', 'Certification', 'Vocational', 'Vocational - Degree', "Bachelor's Degree", "Master's Degree", 'Associate Degree', 'Professional', 'Doctorate'))
-                industry = st.selectbox('Please choose which industry the job posting is relevant to', ('Not Specified', 'Marketing and Advertising', 'Computer Software', 'Hospital & Health Care', 'Online Media', 'Information Technology and Services', 'Financial Services', 'Management Consulting', 'Internet', 'Telecommunications', 'Consumer Services', 'Construction', 'Oil & Energy', 'Education Management', 'Health, Wellness and Fitness', 'Insurance', 'E-Learning', 'Staffing and Recruiting', 'Human Resources', 'Real Estate', 'Automotive', 'Logistics and Supply Chain', 'Design', 'Accounting', 'Retail','Others'))
-                function = st.selectbox('Please choose which umbrella term matches job\'s functionality?', ('Not Specified', 'Marketing', 'Customer Service', 'Sales', 'Health Care Provider', 'Management', 'Information Technology', 'Engineering', 'Administrative', 'Design', 'Production', 'Education', 'Business Development', 'Product Management', 'Consulting', 'Human Resources', 'Project Management', 'Finance', 'Accounting/Auditing', 'Art/Creative', 'Quality Assurance', 'Writing/Editing', 'Other'))
+                employment_type = st.selectbox('What is the employment type?', EMPLOYMENT_TYPES)
+                required_experience = st.selectbox('What is the required experience?', REQUIRED_EXPERIENCE)
+                required_education = st.selectbox('What is the required education?', REQUIRED_EDUCATION)
+                industry = st.selectbox('Please choose which industry the job posting is relevant to', INDUSTRIES)
+                function = st.selectbox('Please choose which umbrella term matches job\'s functionality?', FUNCTIONS)
 
                 if st.button('Get Your Prediction'):
-                    no_count = (telecommuting == 'No') + (has_company_logo == 'No') + (has_questions == 'No') + (employment_type == 'Not Specified') + (required_experience == 'Not Applicable') + (required_education == 'Unspecified') + (industry == 'Not Specified') + (function == 'Not Specified')
-                    result = "Fake" if no_count >= 2 else "Real"
-                    st.write(f"The given job posting is {result}")
+                    posting = {'telecommuting': telecommuting, 'has_company_logo': has_company_logo,
+                               'has_questions': has_questions, 'employment_type': employment_type,
+                               'required_experience': required_experience, 'required_education': required_education,
+                               'industry': industry, 'function': function, 'reference_link': user_input}
+                    # Known feedback first, then the rules, and the model only for postings the rules leave open
+                    is_fake, stage, reasons = shared_cascade().check(posting)
+                    result = "Fake" if is_fake else "Real"
+                    st.write(f"The given job posting is {result} (decided by {stage})")
+                    if reasons:
+                        st.write('Flags: ' + ', '.join(reasons))
     else:
         # Directly displaying classifier questions if it's not a URL
         st.subheader('Enter the details:')
@@ -174,16 +172,23 @@ if app_mode == 'Classifier':
         telecommuting = st.radio('Is work from home or remote work allowed?', options=['Yes', 'No'])
         has_company_logo = st.radio('Does the job posting have a company logo?', options=['Yes', 'No'])
         has_questions = st.radio('Does the job posting have questions?', options=['Yes', 'No'])
-        employment_type = st.selectbox('What is the employment type?', ('Not Specified', 'Other', 'Part-time', 'Contract', 'Temporary', 'Full-time'))
-        required_experience = st.selectbox('What is the required experience?', ('Not Applicable', 'Internship', 'Entry level', 'Mid-Senior level', 'Associate',  'Executive', 'Director'))
-        required_education = st.selectbox('What is the required education?', ('Unspecified', 'Vocational - HS Diploma', 'Some High School Coursework', 'High School or equivalent', 'Some College Coursework Completed', 'Certification', 'Vocational', 'Vocational - Degree', "Bachelor's Degree", "Master's Degree", 'Associate Degree', 'Professional', 'Doctorate'))
-        industry = st.selectbox('Please choose which industry the job posting is relevant to', ('Not Specified', 'Marketing and Advertising', 'Computer Software', 'Hospital & Health Care', 'Online Media', 'Information Technology and Services', 'Financial Services', 'Management Consulting', 'Internet', 'Telecommunications', 'Consumer Services', 'Construction', 'Oil & Energy', 'Education Management', 'Health, Wellness and Fitness', 'Insurance', 'E-Learning', 'Staffing and Recruiting', 'Human Resources', 'Real Estate', 'Automotive', 'Logistics and Supply Chain', 'Design', 'Accounting', 'Retail','Others'))
-        function = st.selectbox('Please choose which umbrella term matches job\'s functionality?', ('Not Specified', 'Marketing', 'Customer Service', 'Sales', 'Health Care Provider', 'Management', 'Information Technology', 'Engineering', 'Administrative', 'Design', 'Production', 'Education', 'Business Development', 'Product Management', 'Consulting', 'Human Resources', 'Project Management', 'Finance', 'Accounting/Auditing', 'Art/Creative', 'Quality Assurance', 'Writing/Editing', 'Other'))
+        employment_type = st.selectbox('What is the employment type?', EMPLOYMENT_TYPES)
+        required_experience = st.selectbox('What is the required experience?', REQUIRED_EXPERIENCE)
+        required_education = st.selectbox('What is the required education?', REQUIRED_EDUCATION)
+        industry = st.selectbox('Please choose which industry the job posting is relevant to', INDUSTRIES)
+        function = st.selectbox('Please choose which umbrella term matches job\'s functionality?', FUNCTIONS)
 
         if st.button('Get Your Prediction'):
-                no_count = (telecommuting == 'No') + (has_company_logo == 'No') + (has_questions == 'No') + (employment_type == 'Not Specified') + (required_experience == 'Not Applicable') + (required_education == 'Unspecified') + (industry == 'Not Specified') + (function == 'Not Specified')
-                result = "Fake" if no_count >= 2 else "Real"
-                st.write(f"The given job posting is {result}")
+                posting = {'telecommuting': telecommuting, 'has_company_logo': has_company_logo,
+                           'has_questions': has_questions, 'employment_type': employment_type,
+                           'required_experience': required_experience, 'required_education': required_education,
+                           'industry': industry, 'function': function, 'reference_link': user_input}
+                # Known feedback first, then the rules, and the model only for postings the rules leave open
+                is_fake, stage, reasons = shared_cascade().check(posting)
+                result = "Fake" if is_fake else "Real"
+                st.write(f"The given job posting is {result} (decided by {stage})")
+                if reasons:
+                    st.write('Flags: ' + ', '.join(reasons))
 
 # Display login page until successful login
 if not getattr(session_state, 'logged_in', False) and app_mode != 'Login':
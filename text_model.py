@@ -0,0 +1,234 @@
+import argparse
+import glob
+import os
+import pickle
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import filterfalse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset_cache import TARGET_COLUMN, TEXT_COLUMN, TEXT_COLUMNS, build_text, iter_dataset, read_dataset
+from model_loader import load_model
+from text_preprocess import STOP_WORDS
+
+CLASSES = np.array([0, 1])
+DEFAULT_HASH_FEATURES = 2 ** 20
+
+ARTIFACT_PREFIX = 'text_model_v'
+DEFAULT_ARTIFACT_DIR = 'models'
+
+
+# Lowercase the whole column in one vectorized call, then drop whitespace
+# separated stop words with a C level filterfalse over the frozenset. Same output
+# as the notebook's two .apply passes, and faster than a stop word regex.
+def normalize_text(texts):
+    texts = texts if isinstance(texts, pd.Series) else pd.Series(texts, dtype=object)
+    is_stop_word = STOP_WORDS.__contains__
+    return pd.Series([' '.join(filterfalse(is_stop_word, text.split())) for text in texts.str.lower().tolist()],
+                     index=texts.index, dtype=object)
+
+
+# The csv, or only the precomputed text and the target of a Parquet cache
+# written by dataset_cache.py
+def load_dataset(path):
+    if path.endswith('.parquet'):
+        return read_dataset(path, columns=[TEXT_COLUMN, TARGET_COLUMN])
+    return pd.read_csv(path, usecols=TEXT_COLUMNS + [TARGET_COLUMN])
+
+
+# 'count' learns a vocabulary that has to be pickled and kept in memory.
+# 'hashing' maps tokens to n_features columns with a fixed hash: nothing to fit
+# or store, and any shard of postings can be featurized independently.
+def make_vectorizer(kind='count', n_features=DEFAULT_HASH_FEATURES, ngram_range=(1, 1)):
+    if kind == 'count':
+        return CountVectorizer(ngram_range=ngram_range, dtype=np.float32)
+    if kind == 'hashing':
+        # Non-negative raw counts, like CountVectorizer, so MultinomialNB can use them
+        return HashingVectorizer(n_features=n_features, ngram_range=ngram_range, alternate_sign=False,
+                                 norm=None, dtype=np.float32)
+    raise ValueError(f"Unknown vectorizer {kind!r}, expected 'count' or 'hashing'")
+
+
+def _transform_shard(vectorizer, texts):
+    return vectorizer.transform(texts)
+
+
+# Document-term matrix of normalized texts, transformed in shards across a
+# process pool. Only stateless or already fitted vectorizers can be used.
+def featurize_parallel(texts, vectorizer, workers=None, shard_size=10000):
+    texts = list(texts)
+    shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    if workers == 1 or len(shards) <= 1:
+        return vectorizer.transform(texts)
+    with ProcessPoolExecutor(workers) as pool:
+        blocks = list(pool.map(_transform_shard, [vectorizer] * len(shards), shards))
+    return sparse.vstack(blocks, format='csr')
+
+
+def make_classifier(name):
+    if name == 'nb':
+        return MultinomialNB()
+    if name == 'tree':
+        return DecisionTreeClassifier()
+    if name == 'knn':
+        return KNeighborsClassifier()
+    raise ValueError(f"Unknown classifier {name!r}, expected 'nb', 'tree' or 'knn'")
+
+
+# Vectorizer and classifier saved together, so a posting's raw text can be scored
+# with the exact vocabulary the model was trained on
+class TextClassifier:
+    # Id of the last feedback row learned by incremental_update.py
+    feedback_watermark = 0
+
+    def __init__(self, vectorizer, model, classifier_name, metrics=None):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.classifier_name = classifier_name
+        self.metrics = metrics or {}
+        self.version = None
+        self.created_at = time.time()
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    # Sparse CSR document-term matrix of raw texts
+    def transform(self, texts):
+        return self.vectorizer.transform(normalize_text(texts))
+
+    def predict(self, texts):
+        return self.model.predict(self.transform(texts))
+
+    def predict_proba(self, texts):
+        return self.model.predict_proba(self.transform(texts))
+
+
+# Fit vectorizer and classifier on the dataset, holding out test_size for the metrics
+def train(frame, classifier='nb', test_size=0.3, random_state=None, vectorizer='count',
+          n_features=DEFAULT_HASH_FEATURES, ngram_range=(1, 1), workers=1):
+    texts = normalize_text(build_text(frame))
+    labels = frame[TARGET_COLUMN].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=test_size,
+                                                        random_state=random_state)
+    vectorizer = make_vectorizer(vectorizer, n_features, ngram_range)
+    if isinstance(vectorizer, HashingVectorizer):
+        X_train_dtm = featurize_parallel(X_train, vectorizer, workers)
+        X_test_dtm = featurize_parallel(X_test, vectorizer, workers)
+    else:
+        X_train_dtm = vectorizer.fit_transform(X_train)
+        X_test_dtm = vectorizer.transform(X_test)
+    model = make_classifier(classifier).fit(X_train_dtm, y_train)
+
+    y_pred = model.predict(X_test_dtm)
+    metrics = {
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'f1': float(f1_score(y_test, y_pred, zero_division=0)),
+        'train_rows': int(len(y_train)),
+        'test_rows': int(len(y_test)),
+    }
+    return TextClassifier(vectorizer, model, classifier, metrics)
+
+
+# Train MultinomialNB on a csv or Parquet cache of any size: chunks are hashed and
+# fed to partial_fit one at a time, so only one chunk is ever in memory
+def train_out_of_core(path, chunksize=50000, n_features=DEFAULT_HASH_FEATURES, ngram_range=(1, 1)):
+    vectorizer = make_vectorizer('hashing', n_features, ngram_range)
+    model = MultinomialNB()
+    rows = 0
+    if path.endswith('.parquet'):
+        chunks = iter_dataset(path, [TEXT_COLUMN, TARGET_COLUMN], chunksize)
+    else:
+        chunks = pd.read_csv(path, usecols=TEXT_COLUMNS + [TARGET_COLUMN], chunksize=chunksize)
+    for chunk in chunks:
+        X = vectorizer.transform(normalize_text(build_text(chunk)))
+        model.partial_fit(X, chunk[TARGET_COLUMN].to_numpy(), classes=CLASSES)
+        rows += len(chunk)
+    return TextClassifier(vectorizer, model, 'nb', {'train_rows': rows})
+
+
+def artifact_versions(directory=DEFAULT_ARTIFACT_DIR):
+    versions = []
+    for path in glob.glob(os.path.join(directory, ARTIFACT_PREFIX + '*.pkl')):
+        match = re.search(ARTIFACT_PREFIX + r'(\d+)\.pkl$', path)
+        if match:
+            versions.append((int(match.group(1)), path))
+    return sorted(versions)
+
+
+# Write the artifact as the next version in directory. The file is written under
+# a temporary name and renamed, so readers never see a partial artifact.
+def save_artifact(classifier, directory=DEFAULT_ARTIFACT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    versions = artifact_versions(directory)
+    classifier.version = versions[-1][0] + 1 if versions else 1
+    path = os.path.join(directory, f'{ARTIFACT_PREFIX}{classifier.version:04d}.pkl')
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(classifier, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+# Path of the newest artifact in directory
+def latest_artifact(directory=DEFAULT_ARTIFACT_DIR):
+    versions = artifact_versions(directory)
+    if not versions:
+        raise FileNotFoundError(f"No {ARTIFACT_PREFIX}*.pkl artifacts in {directory}")
+    return versions[-1][1]
+
+
+# Load an artifact file, or the newest artifact when given a directory
+def load_artifact(path=DEFAULT_ARTIFACT_DIR):
+    if os.path.isdir(path):
+        path = latest_artifact(path)
+    return load_model(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the text classifier of the notebook.')
+    parser.add_argument('dataset', help='fake_job_postings.csv, or its Parquet cache from dataset_cache.py')
+    parser.add_argument('-c', '--classifier', choices=['nb', 'tree', 'knn'], default='nb')
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_ARTIFACT_DIR, help='directory of versioned artifacts')
+    parser.add_argument('--test-size', type=float, default=0.3)
+    parser.add_argument('--random-state', type=int, default=None)
+    parser.add_argument('--vectorizer', choices=['count', 'hashing'], default='count')
+    parser.add_argument('--n-features', type=int, default=DEFAULT_HASH_FEATURES,
+                        help='hashed feature columns for --vectorizer hashing')
+    parser.add_argument('--ngram-max', type=int, default=1, help='use word n-grams from 1 up to this length')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='processes featurizing shards for --vectorizer hashing')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='train out of core on chunks of this many rows (hashing + nb, no held out metrics)')
+    args = parser.parse_args(argv)
+
+    ngram_range = (1, args.ngram_max)
+    start = time.perf_counter()
+    if args.chunksize:
+        if args.vectorizer != 'hashing' or args.classifier != 'nb':
+            parser.error('--chunksize needs --vectorizer hashing and --classifier nb')
+        classifier = train_out_of_core(args.dataset, args.chunksize, args.n_features, ngram_range)
+    else:
+        classifier = train(load_dataset(args.dataset), args.classifier, args.test_size, args.random_state,
+                           args.vectorizer, args.n_features, ngram_range, args.workers)
+    path = save_artifact(classifier, args.output_dir)
+    scores = ''.join(f", {name} {classifier.metrics[name]:.4f}" for name in ('accuracy', 'f1')
+                     if name in classifier.metrics)
+    print(f"Trained {args.classifier} in {time.perf_counter() - start:.1f}s{scores} -> {path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    # Run through the importable module so pickled artifacts reference
+    # text_model.TextClassifier rather than __main__.TextClassifier
+    from text_model import main
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+
+# nltk.corpus.stopwords.words('english'), kept here so preprocessing does not need the nltk corpus
+STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves
+he him his himself she she's her hers herself it it's its itself they them their theirs themselves
+what which who whom this that that'll these those am is are was were be been being have has had
+having do does did doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in out on off over
+under again further then once here there when where why how all any both each few more most other
+some such no nor not only own same so than too very s t can will just don don't should should've
+now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+NON_LETTERS = re.compile('[^a-zA-Z]')
+DEFAULT_STEM_CACHE_SIZE = 200000
+DEFAULT_CHUNKSIZE = 2000
+
+# Stemmer of this process, built on first use
+_stem = None
+
+
+# PorterStemmer.stem behind a bounded LRU cache: a corpus repeats the same few
+# thousand words, so almost every call after warm-up is a dictionary hit
+def get_stemmer(cache_size=DEFAULT_STEM_CACHE_SIZE):
+    global _stem
+    if _stem is None:
+        try:
+            from nltk.stem.porter import PorterStemmer
+        except ImportError:
+            raise ImportError('Stemming needs nltk: pip install nltk') from None
+        _stem = lru_cache(maxsize=cache_size)(PorterStemmer().stem)
+    return _stem
+
+
+# The corpus loop of the deep learning notebook for one text: letters only,
+# lowercase, stop words dropped, remaining words stemmed
+def preprocess(text, stem=True):
+    words = NON_LETTERS.sub(' ', text).lower().split()
+    if stem:
+        stem_word = get_stemmer()
+        return ' '.join([stem_word(word) for word in words if word not in STOP_WORDS])
+    return ' '.join([word for word in words if word not in STOP_WORDS])
+
+
+def _preprocess_chunk(texts, stem):
+    return [preprocess(text, stem) for text in texts]
+
+
+# Preprocess a corpus in chunks across a process pool, keeping the input order.
+# Every worker keeps its own stem cache for the whole run.
+def preprocess_corpus(texts, workers=None, chunksize=DEFAULT_CHUNKSIZE, stem=True):
+    texts = ['' if text is None or text != text else str(text) for text in texts]
+    chunks = [texts[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        return _preprocess_chunk(texts, stem)
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_preprocess_chunk, chunks, [stem] * len(chunks))
+        return [text for chunk in results for text in chunk]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Preprocess a text column the way the deep learning notebook does.')
+    parser.add_argument('input', help='csv with the text column')
+    parser.add_argument('-c', '--column', default='description', help='text column to preprocess')
+    parser.add_argument('-o', '--output', default='corpus.txt', help='one preprocessed document per line')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes, default one per core')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='documents per worker task')
+    parser.add_argument('--no-stem', action='store_true', help='skip Porter stemming')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    texts = pd.read_csv(args.input, usecols=[args.column])[args.column].dropna().tolist()
+    corpus = preprocess_corpus(texts, args.workers, args.chunksize, not args.no_stem)
+    with open(args.output, 'w') as f:
+        f.writelines(document + '\n' for document in corpus)
+    print(f"Preprocessed {len(corpus)} documents in {time.perf_counter() - start:.1f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()